@@ -1,118 +1,181 @@
+from bytecode import (Bytecode, decode, LOAD_CONST, LOAD_VAR, STORE, PRINT,
+    ADD, SUB, MUL, DIV, POW, ARRAY, STORE_ARRAY, LOAD_ARRAY, ARRAY_LENGTH,
+    LT, GT, LE, GE, EQ, JUMP, JUMPF, ITER_INIT, ITER_HASNEXT, ITER_NEXT,
+    ADD_VAR, SUB_VAR, MUL_VAR, DIV_VAR, REDUCE, MAP, LOAD_VAR_CHECKED)
+from regalloc import allocate_registers
+from peephole import peephole, PASSES
+from bytecode_file import load_bytecode
+from tracing import tracer, TRACE
+from vector import reduce_array, map_array
+from arrays import PackedArray, index_error
+
 # --- IR Executor ---
 class IRExecutor:
-    def __init__(self):
-        self.variables = {}  # Named variable storage
-        self.temp_table = {}  # Temporary variable storage
-        self.arrays = {}
+    def __init__(self, peephole_passes=PASSES, max_instructions=None):
+        self.peephole_passes = peephole_passes  # Peephole passes to run; empty to disable
+        self.max_instructions = max_instructions  # Instruction budget per run; None for no limit
+        self.peephole_report = None  # PeepholeReport from the last execute()
+        self.variables = []  # Variable storage, indexed by symbol slot
+        self.registers = []  # Register file for temporaries (arrays are lists or PackedArrays)
 
-    def execute(self, instructions):
-        """Execute the generated IR instructions."""
-        output = []  # Store execution results
-        for idx, instr in enumerate(instructions):
-            print(f"Processing instruction: {instr}")  # Debugging
-            parts = self._split_instruction(instr)
-            print(f"Parts: {parts}")  # Debugging
-            op = parts[0]
+    def execute(self, instructions, output=None):
+        """Execute the generated IR instructions.
 
-            try:
-                if op == "LOAD":
-                    # Load a literal or variable value into a temporary variable
-                    value = parts[1]
-                    temp = parts[2]
-                    if value.startswith("\"") and value.endswith("\""):  # Quoted string literal
-                        self.temp_table[temp] = value[1:-1]  # Strip quotes
-                    elif "." in value:
-                        self.temp_table[temp] = float(value)
-                    elif value.isdigit():  # Integer literal
-                        self.temp_table[temp] = int(value)
-                    elif value in self.variables:  # Named variable
-                        self.temp_table[temp] = self.variables[value]
-                    else:
-                        raise Exception(f"LOAD: Undefined variable or value: {value}")
-                elif op == "STORE":
-                    # Store the value of a temporary variable into a named variable
-                    temp = parts[1].strip(",")
-                    var_name = parts[2]
-                    if temp in self.temp_table:
-                        self.variables[var_name] = self.temp_table[temp]
-                    else:
-                        raise Exception(f"STORE: Undefined temporary variable: {temp}")
-                elif op == "PRINT":
-                    # Print the value of a variable or temporary variable
-                    key = parts[1]
-                    value = self._resolve_value(key)
-                    output.append(str(value))
-                elif op in {"ADD", "SUB", "MUL", "DIV"}:
-                    # Perform arithmetic operations
-                    left = self._resolve_value(parts[1].strip(","))
-                    right = self._resolve_value(parts[2].strip(","))
-                    result = self._perform_operation(op, left, right)
-                    self.temp_table[parts[3]] = result
-                elif op == "ARRAY":
-                    temp = parts[1]
-                    length = int(parts[2])
-                    self.arrays[temp] = [None] * length
-                elif op == "STORE_ARRAY":
-                    array_temp = parts[1]
-                    index = int(parts[2])
-                    value_temp = parts[3]
+        Accepts either the text IR from IRGenerator (decoded once here) or an
+        already decoded Bytecode object.
+        """
+        bytecode = instructions if isinstance(instructions, Bytecode) else decode(instructions)
+        if bytecode.num_registers is None:
+            if self.peephole_passes:
+                bytecode, self.peephole_report = peephole(bytecode, self.peephole_passes)
+            bytecode = allocate_registers(bytecode)
+        return self.run(bytecode, output)
 
-                    if array_temp not in self.arrays:
-                        raise Exception(f"Undefined array: {array_temp}")
+    def execute_file(self, path, mapped=True, output=None):
+        """Execute a bytecode file written by write_bytecode, reading it from a memory map."""
+        return self.run(load_bytecode(path, mapped), output)
 
-                    value = self._resolve_value(value_temp)
-                    self.arrays[array_temp][index] = value
-                elif op == "LOAD_ARRAY":
-                    array_temp = parts[1]
-                    index_temp = parts[2]
-                    result_temp = parts[3]
+    def run(self, bytecode, output=None):
+        """Execute a register-allocated Bytecode object.
 
-                    if array_temp not in self.arrays:
-                        raise Exception(f'Undefined array: {array_temp}')
+        With an OutputWriter, each PRINT is streamed to it as the program runs
+        and None is returned. Without one, the printed lines are collected and
+        returned as a single string.
+        """
+        if output is None:
+            lines = []
+            self._dispatch(bytecode, lines.append)
+            return "\n".join(lines)
+        try:
+            self._dispatch(bytecode, output.write_line)
+        finally:
+            output.flush()  # Deliver partial output even when the program fails
 
-                    index = self._resolve_value(index_temp)
-                    value = self.arrays[array_temp][index]
-                    self.temp_table[result_temp] = value
-                elif op == "ARRAY_LENGTH":
-                    array_temp = parts[1]
-                    result_temp = parts[2]
+    def _dispatch(self, bytecode, write):
+        """Run the instruction loop, dispatching on integer opcodes.
 
-                    if array_temp not in self.arrays:
-                        raise Exception(f"Undefined array: {array_temp}")
+        Execution is driven by a program counter; jump operands were resolved
+        to instruction indexes by the decoder, so a jump is O(1). Temporaries
+        live in a preallocated register list indexed by the allocator's numbers,
+        and variables in a list indexed by their symbol slot. PRINT passes each
+        line to write().
 
-                    self.temp_table[result_temp] = len(self.arrays[array_temp])
+        The instruction budget is charged only when a jump is taken, with the
+        length of the straight-line run that led to it. Any program that runs
+        for long must jump, so the limit holds without a per-instruction cost.
+        """
+        registers = self.registers = [None] * bytecode.num_registers
+        variables = self.variables = [None] * len(bytecode.variable_names)  # None marks an unassigned slot
+        constants = bytecode.constants
+        trace = tracer.level >= TRACE  # Checked once; no formatting when tracing is off
+        code = bytecode.code
+        count = len(code)
+        limit = self.max_instructions if self.max_instructions is not None else float("inf")
+        executed = 0  # Instructions executed before the current straight-line run
+        run_start = 0  # Index at which the current straight-line run began
+        pc = 0
+        while pc < count:
+            idx = pc
+            op, a, b, c = code[idx]
+            if trace:
+                tracer.emit(TRACE, "exec", f"{idx}: {bytecode.source[idx]} -> {code[idx]}")
+            pc += 1
+
+            try:
+                if op == LOAD_CONST:
+                    # Load a literal from the constant pool into a register
+                    registers[b] = constants[a]
+                elif op == LOAD_VAR:
+                    # Load a variable slot into a register; the decoder proved it assigned on every path
+                    registers[b] = variables[a]
+                elif op == STORE:
+                    # Store the value of a register into a variable slot
+                    variables[b] = registers[a]
+                elif op == PRINT:
+                    write(str(registers[a]))
+                elif op == ADD:
+                    registers[c] = registers[a] + registers[b]
+                elif op == SUB:
+                    registers[c] = registers[a] - registers[b]
+                elif op == MUL:
+                    registers[c] = registers[a] * registers[b]
+                elif op == DIV:
+                    right = registers[b]
+                    if right == 0:
+                        raise Exception("Division by zero")
+                    registers[c] = registers[a] / right
+                elif op == POW:
+                    registers[c] = registers[a] ** registers[b]
+                elif op == LT:
+                    registers[c] = registers[a] < registers[b]
+                elif op == GT:
+                    registers[c] = registers[a] > registers[b]
+                elif op == LE:
+                    registers[c] = registers[a] <= registers[b]
+                elif op == GE:
+                    registers[c] = registers[a] >= registers[b]
+                elif op == EQ:
+                    registers[c] = registers[a] == registers[b]
+                elif op == JUMP:
+                    executed += pc - run_start
+                    if executed > limit:
+                        raise Exception(f"Instruction limit of {self.max_instructions} exceeded")
+                    pc = run_start = a
+                elif op == JUMPF:
+                    if not registers[a]:
+                        executed += pc - run_start
+                        if executed > limit:
+                            raise Exception(f"Instruction limit of {self.max_instructions} exceeded")
+                        pc = run_start = b
+                elif op == ARRAY:
+                    registers[a] = [None] * b
+                elif op == STORE_ARRAY:
+                    registers[a][b] = registers[c]
+                elif op == LOAD_ARRAY:
+                    registers[c] = registers[a][registers[b]]
+                elif op == ARRAY_LENGTH:
+                    registers[b] = len(registers[a])
+                elif op == ITER_INIT:
+                    # Iterator state is a [sequence, position] pair
+                    registers[b] = [registers[a], 0]
+                elif op == ITER_HASNEXT:
+                    sequence, position = registers[a]
+                    if position >= len(sequence):
+                        executed += pc - run_start
+                        if executed > limit:
+                            raise Exception(f"Instruction limit of {self.max_instructions} exceeded")
+                        pc = run_start = b
+                elif op == ITER_NEXT:
+                    iterator = registers[a]
+                    variables[b] = iterator[0][iterator[1]]
+                    iterator[1] += 1
+                elif op == ADD_VAR:
+                    variables[c] = variables[a] + variables[b]
+                elif op == SUB_VAR:
+                    variables[c] = variables[a] - variables[b]
+                elif op == MUL_VAR:
+                    variables[c] = variables[a] * variables[b]
+                elif op == DIV_VAR:
+                    right = variables[b]
+                    if right == 0:
+                        raise Exception("Division by zero")
+                    variables[c] = variables[a] / right
+                elif op == LOAD_VAR_CHECKED:
+                    value = variables[a]
+                    if value is None:
+                        raise Exception(f"Undefined variable: {bytecode.variable_names[a]}")
+                    registers[b] = value
+                elif op == REDUCE:
+                    if variables[c] is None:
+                        raise Exception(f"Undefined variable: {bytecode.variable_names[c]}")
+                    variables[c] = reduce_array(b, registers[a], variables[c])
+                elif op == MAP:
+                    registers[c] = map_array(b, registers[a], registers[c])
                 else:
                     raise Exception(f"Unsupported operation: {op}")
+            except MemoryError:
+                raise  # Left unwrapped so a memory limit can be told apart from a program error
             except Exception as e:
-                raise Exception(f"Error at instruction {idx}: {instr}\n{e}")
-
-        return "\n".join(output)
-
-    def _split_instruction(self, instr):
-        """Custom splitting logic to preserve quoted strings."""
-        import re
-        return re.findall(r'\".*?\"|\S+', instr)
-
-    def _resolve_value(self, key):
-        """Resolve the value of a variable or temporary variable."""
-        if key in self.temp_table:
-            return self.temp_table[key]
-        elif key in self.variables:
-            return self.variables[key]
-        else:
-            raise Exception(f"Undefined variable or temp: {key}")
-
-    def _perform_operation(self, op, left, right):
-        """Perform arithmetic operations."""
-        if op == "ADD":
-            return left + right
-        elif op == "SUB":
-            return left - right
-        elif op == "MUL":
-            return left * right
-        elif op == "DIV":
-            if right == 0:
-                raise Exception("Division by zero")
-            return left / right
-        elif op == "POW":
-            return left ** right
\ No newline at end of file
+                if op == LOAD_ARRAY and isinstance(registers[a], PackedArray):
+                    e = index_error(registers[a], registers[b])  # array.array words its errors differently
+                raise Exception(f"Error at instruction {idx}: {bytecode.source[idx]}\n{e}")
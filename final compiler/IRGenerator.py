@@ -1,11 +1,17 @@
 from parser import (Program, Assignment, PrintStatement, BinaryOp, Literal, 
     Variable, Array, ArrayAccess, ForLoop, WhileLoop, IfStatement) 
+from symbols import SymbolTable, resolve_symbols
+from optimizer import fold_constants
+from arrays import infer_typecode
 
 # --- IR Generator ---
 class IRGenerator:
-    def __init__(self):
+    def __init__(self, optimize=True):
+        self.optimize = optimize  # Fold constant expressions before emitting IR
         self.instructions = []  # List of IR instructions
         self.temp_counter = 0  # Counter for temporary variables
+        self.label_counter = 0  # Counter for labels
+        self.symbols = SymbolTable()  # Variable slots, resolved before code is emitted
 
     def new_temp(self):
         """Generate a new temporary variable."""
@@ -13,6 +19,23 @@ class IRGenerator:
         self.temp_counter += 1
         return temp
 
+    def new_label(self):
+        """Generate a new label."""
+        label = f"L{self.label_counter}"
+        self.label_counter += 1
+        return label
+
+    def generate_statement(self, statement):
+        """Generate IR for one top-level statement, as passed by Parser.parse_streaming.
+
+        Statements must arrive in program order, so each sees the variables
+        assigned before it.
+        """
+        if self.optimize:
+            statement = fold_constants(statement)
+        resolve_symbols(statement, self.symbols)
+        self.generate(statement)
+
     def generate(self, node):
         """Generate IR for a given AST node."""
         # Handle primitive types directly
@@ -20,6 +43,10 @@ class IRGenerator:
             node = Literal(node)
 
         if isinstance(node, Program):
+            if self.optimize:
+                node = fold_constants(node)
+            # Undefined variables are reported here, before any IR is emitted
+            resolve_symbols(node, self.symbols)
             for statement in node.statements:
                 self.generate(statement)
         elif isinstance(node, Assignment):
@@ -51,7 +78,8 @@ class IRGenerator:
             if isinstance(node.value, str):  # String literals
                 self.instructions.append(f"LOAD \"{node.value}\" {temp}")
             elif isinstance(node.value, float):
-                self.instructions.append(f"LOAD {node.value:.6f} {temp}")
+                # repr() round-trips exactly, unlike a fixed number of decimals
+                self.instructions.append(f"LOAD {node.value!r} {temp}")
             else:  # Numeric literals
                 self.instructions.append(f"LOAD {node.value} {temp}")
             return temp
@@ -63,31 +91,44 @@ class IRGenerator:
         elif isinstance(node, Array):
             # Create a temporary array
             temp = self.new_temp()
-            # Generate IR for each element in the array
-            element_temps = [self.generate(element) for element in node.elements]
-            
-            # Add instructions to create the array
-            self.instructions.append(f"ARRAY {temp} {len(element_temps)}")
-            
-            # Add instructions to populate the array
-            for i, element_temp in enumerate(element_temps):
+
+            # All-int or all-float literals become one packed constant
+            values = [element.value if isinstance(element, Literal) else element for element in node.elements]
+            typecode = infer_typecode(values)
+            if typecode is not None:
+                elements = " ".join(repr(value) for value in values)
+                self.instructions.append(f"ARRAY_CONST {temp} {typecode} {elements}")
+                return temp
+
+            self.instructions.append(f"ARRAY {temp} {len(node.elements)}")
+
+            # Populate it one element at a time, so each element temp dies at its store
+            for i, element in enumerate(node.elements):
+                element_temp = self.generate(element)
                 self.instructions.append(f"STORE_ARRAY {temp} {i} {element_temp}")
             return temp
         elif isinstance(node, ForLoop):
+            # Reduction and map loops run as a single vector instruction
+            if self._generate_vector_loop(node):
+                return
+
             iterable_temp = self.generate(node.iterable)
 
-            lenght_temp = self.new_temp()
-            self.instructions.append(f"ARRAY_LENGTH {iterable_temp} {lenght_temp}")
+            length_temp = self.new_temp()
+            self.instructions.append(f"ARRAY_LENGTH {iterable_temp} {length_temp}")
 
             counter_temp = self.new_temp()
             self.instructions.append(f"LOAD 0 {counter_temp}")
 
-            loop_start_label = self.new_temp()
-            loop_end_label = self.new_temp()
+            step_temp = self.new_temp()
+            self.instructions.append(f"LOAD 1 {step_temp}")
+
+            loop_start_label = self.new_label()
+            loop_end_label = self.new_label()
 
             self.instructions.append(f"LABEL {loop_start_label}")
             comparison_temp = self.new_temp()
-            self.instructions.append(f"LT {counter_temp} {lenght_temp} {comparison_temp}")
+            self.instructions.append(f"LT {counter_temp} {length_temp} {comparison_temp}")
 
             self.instructions.append(f"JUMPF {comparison_temp} {loop_end_label}")
 
@@ -99,16 +140,44 @@ class IRGenerator:
             for statement in node.body:
                 self.generate(statement)
 
-            increment_temp = self.new_temp()
-            self.instructions.append(f"ADD {counter_temp} 1 {increment_temp}")
-            self.instructions.append(f"STORE {increment_temp} {counter_temp}")
-
-            self.instructions.append(f"ADD {counter_temp} 1 {increment_temp}")
-            self.instructions.append(f"STORE {increment_temp} {counter_temp}")
+            # The counter temp is updated in place on every iteration
+            self.instructions.append(f"ADD {counter_temp} {step_temp} {counter_temp}")
 
             self.instructions.append(f"JUMP {loop_start_label}")
 
             self.instructions.append(f"LABEL {loop_end_label}")
+        elif isinstance(node, WhileLoop):
+            loop_start_label = self.new_label()
+            loop_end_label = self.new_label()
+
+            self.instructions.append(f"LABEL {loop_start_label}")
+            condition_temp = self.generate(node.condition)
+            self.instructions.append(f"JUMPF {condition_temp} {loop_end_label}")
+
+            for statement in node.body:
+                self.generate(statement)
+
+            self.instructions.append(f"JUMP {loop_start_label}")
+            self.instructions.append(f"LABEL {loop_end_label}")
+        elif isinstance(node, IfStatement):
+            end_label = self.new_label()
+            branches = [(node.condition, node.body)] + list(node.elif_clauses)
+
+            # Each condition falls through to the next branch when false
+            for condition, body in branches:
+                next_label = self.new_label()
+                condition_temp = self.generate(condition)
+                self.instructions.append(f"JUMPF {condition_temp} {next_label}")
+                for statement in body:
+                    self.generate(statement)
+                self.instructions.append(f"JUMP {end_label}")
+                self.instructions.append(f"LABEL {next_label}")
+
+            if node.else_clause:
+                for statement in node.else_clause:
+                    self.generate(statement)
+
+            self.instructions.append(f"LABEL {end_label}")
         elif isinstance(node, ArrayAccess):
             # Generate IR to access an array element
             array_temp = self.generate(node.array)
@@ -119,6 +188,109 @@ class IRGenerator:
         else:
             raise Exception(f"Unsupported AST node: {type(node)}")
 
+    # --- Vector Loops ---
+    def _generate_vector_loop(self, node):
+        """Emit a REDUCE or MAP in place of a for loop whose whole body is a reduction or map.
+
+        Returns False, emitting nothing, for any other loop. The loop variable
+        is left holding the last element, as the loop would leave it. A map
+        computes every element before concatenating, so a loop that fails in
+        both may report the other error first.
+        """
+        match = self._match_vector_loop(node)
+        if match is None:
+            return False
+        instruction, kind, accumulator, scalar = match
+
+        iterable_temp = self.generate(node.iterable)
+        length_temp = self.new_temp()
+        self.instructions.append(f"ARRAY_LENGTH {iterable_temp} {length_temp}")
+        end_label = self.new_label()
+        # An empty array runs no iterations, so nothing may change
+        self.instructions.append(f"JUMPF {length_temp} {end_label}")
+
+        if instruction == "REDUCE":
+            self.instructions.append(f"REDUCE {iterable_temp} {kind} {accumulator}")
+        else:
+            # MAP replaces the scalar in its temp with the list of mapped elements
+            mapped_temp = self.generate(scalar)
+            self.instructions.append(f"MAP {iterable_temp} {kind} {mapped_temp}")
+            accumulator_temp = self.generate(Variable(accumulator))
+            result_temp = self.new_temp()
+            self.instructions.append(f"ADD {accumulator_temp} {mapped_temp} {result_temp}")
+            self.instructions.append(f"STORE {result_temp} {accumulator}")
+
+        index_temp = self.generate(Literal(-1))
+        element_temp = self.new_temp()
+        self.instructions.append(f"LOAD_ARRAY {iterable_temp} {index_temp} {element_temp}")
+        self.instructions.append(f"STORE {element_temp} {node.variable.name}")
+        self.instructions.append(f"LABEL {end_label}")
+        return True
+
+    def _match_vector_loop(self, node):
+        """Recognize a loop body that a vector instruction can replace.
+
+        With v the loop variable, acc another variable and x a literal or a
+        variable other than v and acc, the recognized bodies are:
+
+            acc = acc + v             REDUCE SUM
+            acc = acc * v             REDUCE PRODUCT
+            if v < acc: acc = v       REDUCE MIN
+            if v > acc: acc = v       REDUCE MAX
+            acc = acc + [v op x]      MAP, op being +, -, *, / or **
+            acc = acc + [x op v]      MAP, with the operands reversed
+
+        Returns (instruction, kind, accumulator, scalar), or None.
+        """
+        if len(node.body) != 1:
+            return None
+        element = node.variable.name
+        statement = node.body[0]
+
+        def is_element(expression):
+            return isinstance(expression, Variable) and expression.name == element
+
+        if isinstance(statement, IfStatement):
+            condition = statement.condition
+            if (statement.elif_clauses or statement.else_clause or len(statement.body) != 1
+                    or not isinstance(condition, BinaryOp) or condition.operator not in ("<", ">")
+                    or not is_element(condition.left) or not isinstance(condition.right, Variable)):
+                return None
+            accumulator = condition.right.name
+            update = statement.body[0]
+            if (accumulator == element or not isinstance(update, Assignment)
+                    or update.variable.name != accumulator or not is_element(update.value)):
+                return None
+            return ("REDUCE", "MIN" if condition.operator == "<" else "MAX", accumulator, None)
+
+        if not isinstance(statement, Assignment):
+            return None
+        accumulator = statement.variable.name
+        value = statement.value
+        if (accumulator == element or not isinstance(value, BinaryOp)
+                or not isinstance(value.left, Variable) or value.left.name != accumulator):
+            return None
+        if value.operator in ("+", "*") and is_element(value.right):
+            return ("REDUCE", "SUM" if value.operator == "+" else "PRODUCT", accumulator, None)
+
+        if value.operator != "+" or not isinstance(value.right, Array) or len(value.right.elements) != 1:
+            return None
+        mapped = value.right.elements[0]
+        if not isinstance(mapped, BinaryOp) or mapped.operator not in ("+", "-", "*", "/", "**"):
+            return None
+        if is_element(mapped.left):
+            scalar, prefix = mapped.right, ""
+        elif is_element(mapped.right):
+            scalar, prefix = mapped.left, "R"
+        else:
+            return None
+        if isinstance(scalar, Variable):
+            if scalar.name in (element, accumulator):
+                return None
+        elif not isinstance(scalar, Literal):
+            return None
+        return ("MAP", prefix + self._map_operator(mapped.operator), accumulator, scalar)
+
     def _map_operator(self, operator):
         """Map operator symbols to IR instruction names."""
         operator_map = {
@@ -127,6 +299,11 @@ class IRGenerator:
             "*": "MUL",
             "/": "DIV",
             "**": "POW",
+            "<": "LT",
+            ">": "GT",
+            "<=": "LE",
+            ">=": "GE",
+            "==": "EQ",
         }
         if operator not in operator_map:
             raise Exception(f"Unsupported operator: {operator}")
@@ -0,0 +1,152 @@
+import sys
+from array import array
+
+# --- Packed Arrays ---
+# Array literals whose elements are all int or all float literals are stored
+# as typed array.array buffers: 8 bytes per element instead of a pointer plus
+# a boxed number. They behave like the lists used for other arrays, so
+# printing, comparing and concatenating give the same results either way.
+#
+# A packed literal is one entry in the constant pool, loaded with a single
+# LOAD_CONST. Every evaluation of the literal shares that entry, which is
+# safe because STORE_ARRAY only writes to arrays created by ARRAY.
+#
+# Programs never see the difference: the class is named list, so runtime
+# type errors read as they would for a list, and operations a list does not
+# support fail with the list's message and operator.
+
+INT_TYPECODE = "q"  # Signed 64-bit
+FLOAT_TYPECODE = "d"  # C double
+
+_INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class PackedArray(array):
+    """A typed array.array that prints, compares and reports errors like a list."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    __str__ = __repr__
+
+    def __reduce_ex__(self, protocol):
+        # Rebuilt through a function, since the class is not reachable as arrays.list
+        return (from_bytes, (self.typecode, to_bytes(self)))
+
+    def __eq__(self, other):
+        return self.tolist() == _as_list(other)
+
+    def __ne__(self, other):
+        return self.tolist() != _as_list(other)
+
+    # Comparisons with anything but a sequence are declined, so Python reports
+    # them with the operator and operand order of the source
+    def __lt__(self, other):
+        if not isinstance(other, (list, array)):
+            return NotImplemented
+        return self.tolist() < _as_list(other)
+
+    def __le__(self, other):
+        if not isinstance(other, (list, array)):
+            return NotImplemented
+        return self.tolist() <= _as_list(other)
+
+    def __gt__(self, other):
+        if not isinstance(other, (list, array)):
+            return NotImplemented
+        return self.tolist() > _as_list(other)
+
+    def __ge__(self, other):
+        if not isinstance(other, (list, array)):
+            return NotImplemented
+        return self.tolist() >= _as_list(other)
+
+    def __add__(self, other):
+        if isinstance(other, PackedArray) and other.typecode == self.typecode:
+            return PackedArray(self.typecode, array.__add__(self, other))
+        return self.tolist() + _as_list(other)
+
+    def __radd__(self, other):
+        return _as_list(other) + self.tolist()
+
+    def __mul__(self, count):
+        if not isinstance(count, int):
+            return self.tolist() * count  # Raises the list's error
+        return PackedArray(self.typecode, array.__mul__(self, count))
+
+    __rmul__ = __mul__
+
+
+PackedArray.__name__ = PackedArray.__qualname__ = "list"  # As named in runtime error messages
+
+
+def infer_typecode(values):
+    """Return the typecode for packing a list of literal values, or None if they cannot be packed."""
+    if not values:
+        return None
+    kinds = {type(value) for value in values}
+    if kinds == {int}:
+        if all(_INT_MIN <= value <= _INT_MAX for value in values):
+            return INT_TYPECODE
+        return None
+    if kinds == {float}:
+        return FLOAT_TYPECODE
+    return None  # Mixed, string or nested elements keep the list representation
+
+
+def parse_packed(typecode, texts):
+    """Build a PackedArray from the element texts of an ARRAY_CONST instruction."""
+    if typecode == INT_TYPECODE:
+        return PackedArray(typecode, [int(text) for text in texts])
+    if typecode == FLOAT_TYPECODE:
+        return PackedArray(typecode, [float(text) for text in texts])
+    raise Exception(f"Unsupported array typecode: {typecode}")
+
+
+# --- Serialization ---
+# Packed arrays are written little-endian, like the rest of the bytecode file.
+# marshal, used by the disk cache, cannot store them, so they go through it
+# as a (typecode, bytes) tuple; no other constant is a tuple.
+
+def to_bytes(packed):
+    """Return the little-endian bytes of a packed array."""
+    if sys.byteorder == "big":
+        packed = PackedArray(packed.typecode, packed)
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def from_bytes(typecode, data):
+    """Rebuild a packed array from bytes written by to_bytes."""
+    packed = PackedArray(typecode)
+    packed.frombytes(data)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed
+
+
+def to_marshal(constants):
+    """Return a constant pool with packed arrays replaced by marshal-safe tuples."""
+    return [(value.typecode, value.tobytes()) if isinstance(value, PackedArray) else value
+            for value in constants]
+
+
+def from_marshal(constants):
+    """Undo to_marshal."""
+    return [PackedArray(value[0], value[1]) if isinstance(value, tuple) else value
+            for value in constants]
+
+
+def index_error(packed, index):
+    """Return the error a list would raise for a failed index into a packed array."""
+    try:
+        packed.tolist()[index]
+    except Exception as e:
+        return e
+    return Exception(f"Cannot index array with {index!r}")
+
+
+def _as_list(value):
+    return value.tolist() if isinstance(value, array) else value
@@ -0,0 +1,71 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pipeline import get_pipeline
+from bytecode_file import write_bytecode
+
+# --- Parallel Batch Compilation ---
+# Fans source files out over a process pool. Each worker builds the lexer and
+# parser tables once, in its initializer, and reuses them for every file it
+# is given.
+
+class BatchResult:
+    def __init__(self, path, bytecode=None, output_path=None, error=None, seconds=0.0, report=None):
+        self.path = path  # Source file
+        self.bytecode = bytecode  # Compiled Bytecode, unless it was written to disk
+        self.output_path = output_path  # .ncb file written by the worker, if any
+        self.error = error  # Error message when compilation failed
+        self.seconds = seconds  # Time spent compiling in the worker
+        self.report = report  # PeepholeReport, unless the bytecode came from the cache
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"BatchResult(path={self.path!r}, {status}, seconds={self.seconds:.4f})"
+
+
+def compile_batch(paths, max_workers=None, write_files=False, use_cache=True, stream=False):
+    """Compile many source files in parallel, yielding a BatchResult per file as each finishes.
+
+    With write_files=True each worker writes a .ncb file next to its source and
+    only the output path is sent back, instead of the whole Bytecode object.
+    use_cache=False always recompiles, and stream=True lexes each file in
+    chunks without the cache, as CompilerPipeline.compile_file does.
+    """
+    paths = list(paths)
+    if not paths:
+        return
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_compile_file, path, write_files, use_cache, stream) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _init_worker():
+    """Build this worker's parser tables before it receives any file."""
+    get_pipeline()
+
+
+def _compile_file(path, write_files, use_cache, stream):
+    """Compile one file inside a worker process; errors are returned, not raised."""
+    started = time.perf_counter()
+    try:
+        pipeline = get_pipeline()
+        if stream:
+            bytecode = pipeline.assemble(pipeline.generate_file(path))
+        else:
+            with open(path, "r") as file:
+                code = file.read()
+            bytecode = pipeline.compile(code, use_cache=use_cache)
+        if write_files:
+            output_path = os.path.splitext(path)[0] + ".ncb"
+            write_bytecode(bytecode, output_path)
+            return BatchResult(path, output_path=output_path, seconds=time.perf_counter() - started,
+                               report=pipeline.last_report)
+        return BatchResult(path, bytecode=bytecode, seconds=time.perf_counter() - started,
+                           report=pipeline.last_report)
+    except Exception as e:
+        return BatchResult(path, error=str(e), seconds=time.perf_counter() - started)
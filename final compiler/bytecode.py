@@ -0,0 +1,432 @@
+import re
+from symbols import SymbolTable
+from arrays import parse_packed
+from vector import REDUCTIONS, MAPS
+
+# Bump whenever the opcode numbering or operand layout changes, so cached
+# and serialized bytecode from older compilers is not reused
+BYTECODE_VERSION = 4
+
+# --- Opcodes ---
+# Integer opcodes for the pre-decoded instruction stream
+LOAD_CONST = 0  # LOAD of a literal, by index into the constant pool
+LOAD_VAR = 1  # LOAD of a named variable
+STORE = 2
+PRINT = 3
+ADD = 4
+SUB = 5
+MUL = 6
+DIV = 7
+POW = 8
+ARRAY = 9
+STORE_ARRAY = 10
+LOAD_ARRAY = 11
+ARRAY_LENGTH = 12
+LT = 13
+GT = 14
+LE = 15
+GE = 16
+EQ = 17
+JUMP = 18  # Unconditional jump to a resolved instruction index
+JUMPF = 19  # Jump when the condition operand is false
+ITER_INIT = 20
+ITER_HASNEXT = 21  # Jump to the end label when the iterator is exhausted
+ITER_NEXT = 22
+ADD_VAR = 23  # Fused LOAD/LOAD/ADD/STORE on variable slots (see peephole.py)
+SUB_VAR = 24
+MUL_VAR = 25
+DIV_VAR = 26
+REDUCE = 27  # Fold an array into a variable; replaces a reduction loop (see vector.py)
+MAP = 28  # Combine each array element with a scalar; replaces a map loop
+LOAD_VAR_CHECKED = 29  # LOAD_VAR of a variable that is not assigned on every path to it
+
+OPCODE_NAMES = {
+    LOAD_CONST: "LOAD_CONST",
+    LOAD_VAR: "LOAD_VAR",
+    STORE: "STORE",
+    PRINT: "PRINT",
+    ADD: "ADD",
+    SUB: "SUB",
+    MUL: "MUL",
+    DIV: "DIV",
+    POW: "POW",
+    ARRAY: "ARRAY",
+    STORE_ARRAY: "STORE_ARRAY",
+    LOAD_ARRAY: "LOAD_ARRAY",
+    ARRAY_LENGTH: "ARRAY_LENGTH",
+    LT: "LT",
+    GT: "GT",
+    LE: "LE",
+    GE: "GE",
+    EQ: "EQ",
+    JUMP: "JUMP",
+    JUMPF: "JUMPF",
+    ITER_INIT: "ITER_INIT",
+    ITER_HASNEXT: "ITER_HASNEXT",
+    ITER_NEXT: "ITER_NEXT",
+    ADD_VAR: "ADD_VAR",
+    SUB_VAR: "SUB_VAR",
+    MUL_VAR: "MUL_VAR",
+    DIV_VAR: "DIV_VAR",
+    REDUCE: "REDUCE",
+    MAP: "MAP",
+    LOAD_VAR_CHECKED: "LOAD_VAR_CHECKED",
+}
+
+# Text IR mnemonics that decode one-to-one to an opcode
+_SIMPLE_OPCODES = {
+    "STORE": STORE,
+    "PRINT": PRINT,
+    "ADD": ADD,
+    "SUB": SUB,
+    "MUL": MUL,
+    "DIV": DIV,
+    "POW": POW,
+    "ARRAY": ARRAY,
+    "STORE_ARRAY": STORE_ARRAY,
+    "LOAD_ARRAY": LOAD_ARRAY,
+    "ARRAY_LENGTH": ARRAY_LENGTH,
+    "LT": LT,
+    "GT": GT,
+    "LE": LE,
+    "GE": GE,
+    "EQ": EQ,
+    "JUMP": JUMP,
+    "GOTO": JUMP,  # new.py variant
+    "JUMPF": JUMPF,
+    "IF_FALSE": JUMPF,  # new.py variant: "IF_FALSE t0, GOTO L1"
+    "ITER_INIT": ITER_INIT,
+    "ITER_HASNEXT": ITER_HASNEXT,
+    "ITER_NEXT": ITER_NEXT,
+    "REDUCE": REDUCE,
+    "MAP": MAP,
+    # new.py variant: operators are written as their source symbols
+    "+": ADD,
+    "-": SUB,
+    "*": MUL,
+    "/": DIV,
+    "**": POW,
+    "<": LT,
+    ">": GT,
+    "<=": LE,
+    ">=": GE,
+    "==": EQ,
+    "ARRAY_LOAD": LOAD_ARRAY,  # new.py variant, same operand order
+}
+
+# Opcodes whose operand at the given position is a label name
+JUMP_OPERAND = {
+    JUMP: 0,
+    JUMPF: 1,
+    ITER_HASNEXT: 1,
+}
+
+# Operand positions (0, 1, 2 for a, b, c) that read or write temporaries;
+# after decoding, these are the only operands the register allocator renames
+TEMP_READS = {
+    STORE: (0,),
+    PRINT: (0,),
+    JUMPF: (0,),
+    STORE_ARRAY: (0, 2),
+    LOAD_ARRAY: (0, 1),
+    ARRAY_LENGTH: (0,),
+    ITER_INIT: (0,),
+    ITER_HASNEXT: (0,),
+    ITER_NEXT: (0,),
+    REDUCE: (0,),
+    MAP: (0, 2),  # The scalar goes in and the mapped list comes out in the same temporary
+}
+TEMP_WRITES = {
+    LOAD_CONST: (1,),
+    LOAD_VAR: (1,),
+    LOAD_VAR_CHECKED: (1,),
+    ARRAY: (0,),
+    LOAD_ARRAY: (2,),
+    ARRAY_LENGTH: (1,),
+    ITER_INIT: (1,),
+    MAP: (2,),
+}
+for _op in (ADD, SUB, MUL, DIV, POW, LT, GT, LE, GE, EQ):
+    TEMP_READS[_op] = (0, 1)
+    TEMP_WRITES[_op] = (2,)
+
+# Operand positions that read or write variable slots
+VAR_READS = {
+    LOAD_VAR: (0,),
+    LOAD_VAR_CHECKED: (0,),
+    REDUCE: (2,),  # The accumulator is read and written in place
+}
+VAR_WRITES = {
+    STORE: (1,),
+    ITER_NEXT: (1,),
+    REDUCE: (2,),
+}
+for _op in (ADD_VAR, SUB_VAR, MUL_VAR, DIV_VAR):
+    VAR_READS[_op] = (0, 1)
+    VAR_WRITES[_op] = (2,)
+
+# Split an instruction into operands, keeping quoted strings intact and
+# treating commas as separators (the new.py variant emits "STORE t0, x")
+_OPERAND_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[^\s,]+')
+
+
+# --- Constant Pool ---
+# Interns literal values so each distinct literal is parsed and stored once
+class ConstantPool:
+    def __init__(self):
+        self.values = []  # Constant index -> value
+        self.index = {}  # (type, value) -> constant index; 1, 1.0 and True stay distinct
+        self.text_index = {}  # Literal text from the IR -> constant index
+        self.array_index = {}  # (typecode, element texts) -> constant index of a packed array
+
+    def intern(self, value):
+        """Return the index of a constant, adding it to the pool on first use."""
+        key = (type(value), value)
+        if key not in self.index:
+            self.index[key] = len(self.values)
+            self.values.append(value)
+        return self.index[key]
+
+    def intern_text(self, text):
+        """Return the index of a literal given as IR text, parsing each distinct text once."""
+        if text not in self.text_index:
+            self.text_index[text] = self.intern(_parse_literal(text))
+        return self.text_index[text]
+
+    def intern_array(self, typecode, texts):
+        """Return the index of a packed array literal, given its typecode and element texts."""
+        key = (typecode, tuple(texts))
+        if key not in self.array_index:
+            self.array_index[key] = len(self.values)
+            self.values.append(parse_packed(typecode, texts))
+        return self.array_index[key]
+
+    def __len__(self):
+        return len(self.values)
+
+
+# --- Decoded Program ---
+class Bytecode:
+    def __init__(self, code, source, variable_names, constants, num_registers=None):
+        self.code = code  # List of (opcode, a, b, c) tuples
+        self.source = source  # Original text of each instruction, for error messages
+        self.variable_names = variable_names  # Slot index -> variable name
+        self.constants = constants  # Constant index -> value
+        self.num_registers = num_registers  # Set once temporaries are mapped to registers
+
+    def __len__(self):
+        return len(self.code)
+
+    def disassemble(self):
+        """Return a readable listing of the decoded instructions."""
+        lines = []
+        for idx, (op, a, b, c) in enumerate(self.code):
+            operands = " ".join(repr(x) for x in (a, b, c) if x is not None)
+            lines.append(f"{idx:4d} {OPCODE_NAMES[op]} {operands}".rstrip())
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"Bytecode(instructions={len(self.code)})"
+
+
+# --- Decoder ---
+def decode(instructions, symbols=None):
+    """Decode text IR from IRGenerator into a Bytecode object, once per program.
+
+    LABEL pseudo-instructions are dropped and every jump operand is resolved
+    to the index of the instruction that follows its label, so jumps at run
+    time are a plain assignment to the program counter. Operands in a
+    temporary's position that name a variable or a literal (as the new.py
+    variant emits) get an explicit LOAD, so every such operand is a temporary.
+    The new.py variant fills arrays with ARRAY_STORE and never creates them,
+    so an ARRAY sized to the highest index stored is inserted before the
+    first store into each such array.
+
+    Variable names become slot indexes from the given SymbolTable (normally
+    IRGenerator.symbols). Without one, slots are assigned in order of first
+    appearance and a LOAD of a variable that is never stored is rejected.
+    A LOAD of a variable that some path reaches without assigning it becomes
+    LOAD_VAR_CHECKED, which reports the undefined variable at run time.
+    """
+    if isinstance(instructions, str):
+        instructions = instructions.splitlines()
+
+    # First pass: split instructions and collect every temporary that is written
+    pool = ConstantPool()
+    items = []
+    temps = set()
+    stored = {}  # Stored variable names in order of first appearance
+    sizes = {}  # Array temporary -> length implied by its ARRAY_STOREs
+    for idx, instr in enumerate(instructions):
+        parts = _OPERAND_RE.findall(instr)
+        if not parts:
+            continue
+        if parts[0] == "IF_FALSE" and len(parts) == 4 and parts[2] == "GOTO":
+            parts = ["IF_FALSE", parts[1], parts[3]]
+        if parts[0] != "LABEL":
+            try:
+                op, a, b, c = _decode_instruction(parts, pool)
+            except Exception as e:
+                raise Exception(f"Error decoding instruction {idx}: {instr}\n{e}")
+            operands = [a, b, c]
+            for position in TEMP_WRITES.get(op, ()):
+                temps.add(operands[position])
+            if op in (STORE, ITER_NEXT):
+                stored.setdefault(operands[1])
+            if parts[0] == "ARRAY_STORE":
+                sizes[a] = max(sizes.get(a, 0), b + 1)
+            parts = (op, operands)
+        items.append((idx, instr, parts))
+    uncreated = {temp: size for temp, size in sizes.items() if temp not in temps}
+    temps.update(uncreated)
+
+    # Second pass: record label targets and load non-temporary operands
+    code = []
+    source = []
+    labels = {}
+    loaded = 0
+    if symbols is None:
+        symbols = SymbolTable()
+        for name in stored:
+            symbols.define(name)
+    for idx, instr, parts in items:
+        if isinstance(parts, list):
+            # Keep the first definition; the new.py variant may emit a label twice
+            labels.setdefault(parts[1], len(code))
+            continue
+        op, operands = parts
+        for position in TEMP_READS.get(op, ()):
+            name = operands[position]
+            if name not in temps:
+                temp = f"${loaded}"
+                loaded += 1
+                code.append(_decode_instruction(["LOAD", name, temp], pool))
+                source.append(instr)
+                operands[position] = temp
+        if op == STORE_ARRAY and operands[0] in uncreated:
+            code.append((ARRAY, operands[0], uncreated.pop(operands[0]), None))
+            source.append(instr)
+        code.append((op, operands[0], operands[1], operands[2]))
+        source.append(instr)
+
+    # Third pass: resolve jump operands to instruction indexes and variables to slots
+    for pc, (op, a, b, c) in enumerate(code):
+        try:
+            if op == LOAD_VAR:
+                a = symbols.lookup(a)
+            elif op in (STORE, ITER_NEXT):
+                b = symbols.lookup(b)
+            elif op == REDUCE:
+                c = symbols.lookup(c)
+            elif op in JUMP_OPERAND:
+                operands = [a, b, c]
+                position = JUMP_OPERAND[op]
+                label = operands[position]
+                if label not in labels:
+                    raise Exception(f"Undefined label: {label}")
+                operands[position] = labels[label]
+                a, b, c = operands
+        except Exception as e:
+            raise Exception(f"Error decoding instruction {pc}: {source[pc]}\n{e}")
+        code[pc] = (op, a, b, c)
+    _check_unassigned_loads(code)
+    return Bytecode(code, source, list(symbols.names), pool.values)
+
+
+def _check_unassigned_loads(code):
+    """Turn each LOAD_VAR of a variable that is not definitely assigned into LOAD_VAR_CHECKED.
+
+    A forward must-analysis over the control-flow graph: a slot is assigned
+    on entry to an instruction if every path from the start assigns it.
+    Slot sets are bit masks. Returns nothing; code is changed in place.
+    """
+    count = len(code)
+    successors = []
+    writes = []
+    for pc, (op, a, b, c) in enumerate(code):
+        if op == JUMP:
+            targets = (a,)
+        elif op in (JUMPF, ITER_HASNEXT):
+            targets = (pc + 1, b)
+        else:
+            targets = (pc + 1,)
+        successors.append(tuple(target for target in targets if target < count))
+        operands = (a, b, c)
+        mask = 0
+        for position in VAR_WRITES.get(op, ()):
+            mask |= 1 << operands[position]
+        writes.append(mask)
+
+    everything = -1  # Unreached instructions start with every slot assigned
+    assigned = [everything] * count
+    if count:
+        assigned[0] = 0
+    pending = [0] if count else []
+    while pending:
+        pc = pending.pop()
+        out = assigned[pc] | writes[pc]
+        for successor in successors[pc]:
+            merged = assigned[successor] & out if successor != 0 else 0
+            if merged != assigned[successor]:
+                assigned[successor] = merged
+                pending.append(successor)
+
+    for pc, (op, a, b, c) in enumerate(code):
+        if op == LOAD_VAR and not assigned[pc] >> a & 1:
+            code[pc] = (LOAD_VAR_CHECKED, a, b, c)
+
+
+def _decode_instruction(parts, pool):
+    """Turn the operands of one text instruction into an (opcode, a, b, c) tuple."""
+    op = parts[0]
+    operands = list(parts[1:]) + [None] * (4 - len(parts))
+
+    if op == "LOAD":
+        value, temp = operands[0], operands[1]
+        if _is_literal(value):
+            return (LOAD_CONST, pool.intern_text(value), temp, None)
+        return (LOAD_VAR, value, temp, None)
+    if op == "ARRAY_CONST":
+        # ARRAY_CONST temp typecode element...: a packed literal array, loaded as one constant
+        if len(parts) < 3:
+            raise Exception("ARRAY_CONST needs a temporary and a typecode")
+        return (LOAD_CONST, pool.intern_array(parts[2], parts[3:]), parts[1], None)
+    if op not in _SIMPLE_OPCODES and op != "ARRAY_STORE":
+        raise Exception(f"Unsupported operation: {op}")
+
+    if op == "ARRAY_STORE":
+        # new.py variant: "ARRAY_STORE value, array, index"
+        return (STORE_ARRAY, operands[1], int(operands[2]), operands[0])
+
+    opcode = _SIMPLE_OPCODES[op]
+    a, b, c = operands[0], operands[1], operands[2]
+    if opcode == ARRAY:
+        b = int(b)  # Array length
+    elif opcode == STORE_ARRAY:
+        b = int(b)  # Element index
+    elif opcode == REDUCE:
+        b = _kind(b, REDUCTIONS, "reduction")
+    elif opcode == MAP:
+        b = _kind(b, MAPS, "map")
+    return (opcode, a, b, c)
+
+
+def _kind(name, kinds, description):
+    """Return the operand value of a REDUCE or MAP kind given by name."""
+    if name not in kinds:
+        raise Exception(f"Unsupported {description}: {name}")
+    return kinds.index(name)
+
+
+def _is_literal(value):
+    """Check whether a LOAD operand is a literal rather than a variable name."""
+    return value.startswith("\"") or value[0].isdigit() or (value[0] in "-." and len(value) > 1)
+
+
+def _parse_literal(value):
+    """Convert the text of a literal operand to its runtime value."""
+    if value.startswith("\"") and value.endswith("\""):  # Quoted string literal
+        return value[1:-1]  # Strip quotes
+    if "." in value or "e" in value or "E" in value:
+        return float(value)
+    return int(value)
@@ -0,0 +1,204 @@
+import mmap
+import struct
+from bytecode import Bytecode, BYTECODE_VERSION
+from arrays import PackedArray, to_bytes, from_bytes
+
+# --- Bytecode File Format ---
+# A compiled program on disk, little-endian throughout:
+#
+#   header        magic, version, flags, counts and section offsets
+#   constants     one tagged entry per constant-pool value
+#   symbols       variable names, in slot order
+#   code          one fixed-width record per instruction: opcode and three
+#                 int32 operands (an absent operand is stored as 0)
+#   source        optional; offset table plus UTF-8 text of each instruction
+#
+# The code section is 4-byte aligned so it can be read straight from a
+# memory-mapped file, and processes mapping the same file share its pages.
+
+MAGIC = b"NCBC"
+FLAG_SOURCE = 1  # The file includes the source text of each instruction
+
+_HEADER = struct.Struct("<4sHHIIIIII")  # magic, version, flags, instructions, constants, variables, registers, code offset, source offset
+_INSTRUCTION = struct.Struct("<iiii")
+_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+# Constant pool tags
+_TAG_INT = b"i"
+_TAG_BIGINT = b"I"  # Integers outside int64, stored as decimal text
+_TAG_FLOAT = b"f"
+_TAG_STRING = b"s"
+_TAG_ARRAY = b"a"  # Packed array: typecode, element count, then the raw elements
+
+
+def write_bytecode(bytecode, path, include_source=True):
+    """Write register-allocated Bytecode to a binary file."""
+    if bytecode.num_registers is None:
+        raise Exception("Bytecode must be register-allocated before it is written")
+
+    body = bytearray()
+    for value in bytecode.constants:
+        if isinstance(value, PackedArray):
+            body += _TAG_ARRAY + value.typecode.encode("ascii") + _LENGTH.pack(len(value)) + to_bytes(value)
+        elif isinstance(value, float):
+            body += _TAG_FLOAT + _FLOAT.pack(value)
+        elif isinstance(value, str):
+            body += _TAG_STRING + _pack_text(value)
+        elif -2 ** 63 <= value < 2 ** 63:
+            body += _TAG_INT + _INT.pack(value)
+        else:
+            body += _TAG_BIGINT + _pack_text(str(value))
+    for name in bytecode.variable_names:
+        body += _pack_text(name)
+
+    code_offset = _HEADER.size + len(body)
+    padding = -code_offset % 4
+    body += b"\0" * padding
+    code_offset += padding
+    for op, a, b, c in bytecode.code:
+        body += _INSTRUCTION.pack(op, a or 0, b or 0, c or 0)
+
+    flags = 0
+    source_offset = 0
+    if include_source:
+        flags |= FLAG_SOURCE
+        source_offset = _HEADER.size + len(body)
+        encoded = [text.encode("utf-8") for text in bytecode.source]
+        position = 0
+        for text in encoded:
+            body += _LENGTH.pack(position)
+            position += len(text)
+        body += _LENGTH.pack(position)
+        body += b"".join(encoded)
+
+    header = _HEADER.pack(MAGIC, BYTECODE_VERSION, flags, len(bytecode.code),
+                          len(bytecode.constants), len(bytecode.variable_names),
+                          bytecode.num_registers, code_offset, source_offset)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(body)
+
+
+def load_bytecode(path, mapped=True):
+    """Load a bytecode file written by write_bytecode.
+
+    With mapped=True the file is memory-mapped and instructions are read
+    from the mapping on demand, so startup cost does not grow with program
+    size. With mapped=False the instruction stream is unpacked into a list,
+    which costs a pass over the file but makes each dispatch cheaper.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    (magic, version, flags, count, num_constants, num_variables,
+     num_registers, code_offset, source_offset) = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise Exception(f"Not a bytecode file: {path}")
+    if version != BYTECODE_VERSION:
+        raise Exception(f"Bytecode file {path} has version {version}, expected {BYTECODE_VERSION}")
+    if code_offset + count * _INSTRUCTION.size > len(buffer):
+        raise Exception(f"Truncated bytecode file: {path}")
+
+    offset = _HEADER.size
+    constants = []
+    for _ in range(num_constants):
+        tag = buffer[offset:offset + 1]
+        offset += 1
+        if tag == _TAG_INT:
+            constants.append(_INT.unpack_from(buffer, offset)[0])
+            offset += _INT.size
+        elif tag == _TAG_FLOAT:
+            constants.append(_FLOAT.unpack_from(buffer, offset)[0])
+            offset += _FLOAT.size
+        elif tag in (_TAG_STRING, _TAG_BIGINT):
+            text, offset = _unpack_text(buffer, offset)
+            constants.append(text if tag == _TAG_STRING else int(text))
+        elif tag == _TAG_ARRAY:
+            typecode = buffer[offset:offset + 1].decode("ascii")
+            (length,) = _LENGTH.unpack_from(buffer, offset + 1)
+            offset += 1 + _LENGTH.size
+            size = length * PackedArray(typecode).itemsize
+            constants.append(from_bytes(typecode, buffer[offset:offset + size]))
+            offset += size
+        else:
+            raise Exception(f"Corrupt constant pool in bytecode file: {path}")
+    variable_names = []
+    for _ in range(num_variables):
+        name, offset = _unpack_text(buffer, offset)
+        variable_names.append(name)
+
+    if flags & FLAG_SOURCE:
+        source = MappedSource(buffer, source_offset, count)
+    else:
+        source = MissingSource(count)
+
+    if mapped:
+        code = MappedCode(buffer, code_offset, count)
+    else:
+        end = code_offset + count * _INSTRUCTION.size
+        code = list(_INSTRUCTION.iter_unpack(buffer[code_offset:end]))
+    return Bytecode(code, source, variable_names, constants, num_registers)
+
+
+# --- Mapped Sequences ---
+# Read-only sequences over a memory-mapped file, used in place of the lists
+# a freshly compiled Bytecode holds
+class MappedCode:
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self._unpack = _INSTRUCTION.unpack_from
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("instruction index out of range")
+        return self._unpack(self.buffer, self.offset + index * _INSTRUCTION.size)
+
+    def __iter__(self):
+        end = self.offset + self.count * _INSTRUCTION.size
+        return _INSTRUCTION.iter_unpack(self.buffer[self.offset:end])
+
+
+class MappedSource:
+    def __init__(self, buffer, offset, count):
+        self.buffer = buffer
+        self.offset = offset  # Start of the offset table
+        self.count = count
+        self.text_start = offset + (count + 1) * _LENGTH.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("instruction index out of range")
+        start, end = struct.unpack_from("<II", self.buffer, self.offset + index * _LENGTH.size)
+        return self.buffer[self.text_start + start:self.text_start + end].decode("utf-8")
+
+
+class MissingSource:
+    def __init__(self, count):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return f"<instruction {index}>"
+
+
+def _pack_text(text):
+    encoded = text.encode("utf-8")
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_text(buffer, offset):
+    (length,) = _LENGTH.unpack_from(buffer, offset)
+    offset += _LENGTH.size
+    return buffer[offset:offset + length].decode("utf-8"), offset + length
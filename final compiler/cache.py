@@ -0,0 +1,122 @@
+import hashlib
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from bytecode import Bytecode, BYTECODE_VERSION
+from arrays import to_marshal, from_marshal
+
+# Default on-disk location; override with the NEW_COMPILER_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NEW_COMPILER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "new-compiler"),
+)
+
+
+def _compiler_version():
+    """Return a hash of the compiler's own source files.
+
+    Any edit to the lexer, parser, generator or optimizer can change the
+    bytecode compiled from the same text, so it must change the cache key.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+COMPILER_VERSION = _compiler_version()
+
+# --- Compilation Cache ---
+# Content-addressed cache of compiled bytecode, keyed on a hash of the source
+# text and everything else that affects the output. Entries live in an
+# in-memory LRU bounded by total instruction count and, optionally, on disk.
+class CompilationCache:
+    def __init__(self, max_instructions=1_000_000, cache_dir=DEFAULT_CACHE_DIR):
+        self.max_instructions = max_instructions  # Memory budget, in decoded instructions
+        self.cache_dir = cache_dir  # None keeps the cache in memory only
+        self.entries = OrderedDict()  # Key -> Bytecode, least recently used first
+        self.size = 0  # Instructions currently held in memory
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def key(self, code, options=()):
+        """Return the cache key for source code compiled with the given options."""
+        digest = hashlib.sha256()
+        digest.update(f"{COMPILER_VERSION}|{BYTECODE_VERSION}|{marshal.version}|{options!r}|".encode("utf-8"))
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached Bytecode for a key, or None."""
+        with self.lock:
+            bytecode = self.entries.get(key)
+            if bytecode is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return bytecode
+
+        bytecode = self._read_disk(key)
+        with self.lock:
+            if bytecode is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, bytecode)
+        return bytecode
+
+    def put(self, key, bytecode):
+        """Store compiled Bytecode under a key in memory and on disk."""
+        with self.lock:
+            self._remember(key, bytecode)
+        self._write_disk(key, bytecode)
+
+    def clear(self):
+        """Drop all in-memory entries (files on disk are kept)."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remember(self, key, bytecode):
+        """Insert an entry into the LRU and evict the oldest entries beyond the budget."""
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = bytecode
+        self.size += len(bytecode)
+        while self.size > self.max_instructions and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def _read_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as file:
+                code, source, variable_names, constants, num_registers = marshal.load(file)
+            return Bytecode(code, source, variable_names, from_marshal(constants), num_registers)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None  # Missing, truncated or from an incompatible version
+
+    def _write_disk(self, key, bytecode):
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        fields = (bytecode.code, bytecode.source, bytecode.variable_names,
+                  to_marshal(bytecode.constants), bytecode.num_registers)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                marshal.dump(fields, file)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # The disk cache is best effort; the in-memory entry still exists
@@ -0,0 +1,220 @@
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from pipeline import get_pipeline, LEXERS
+from IRExecutor import IRExecutor
+from output import OutputWriter
+from bytecode_file import write_bytecode
+from batch import compile_batch
+import tracing
+
+EMIT_CHOICES = ("tokens", "ast", "ir", "bytecode")
+
+
+# --- Command-Line Driver ---
+# Headless lexer -> Parser -> IRGenerator -> IRExecutor pipeline. Every file
+# is handled in the same process, so parser tables are built only once, unless
+# --jobs spreads compilation over a process pool.
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        description="Compile and run programs without the IDE.")
+    arg_parser.add_argument("paths", nargs="+",
+                            help="source files, .ncb bytecode files, or directories (batch mode)")
+    arg_parser.add_argument("--emit", choices=EMIT_CHOICES,
+                            help="print the output of a compiler stage instead of running")
+    arg_parser.add_argument("--compile", action="store_true",
+                            help="write a .ncb bytecode file next to each source instead of running")
+    arg_parser.add_argument("--pattern", default="*.txt",
+                            help="file name pattern for directories in batch mode (default: *.txt)")
+    arg_parser.add_argument("--time", action="store_true",
+                            help="report the time spent in each stage on stderr")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="always recompile instead of using the compilation cache")
+    arg_parser.add_argument("--trace", choices=sorted(tracing.LEVEL_NAMES),
+                            help="enable tracing at the given level, written to stderr")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="read and lex source files in chunks instead of whole (skips the cache)")
+    arg_parser.add_argument("--lexer", choices=LEXERS,
+                            help="lexer backend (default: ply, or NEW_COMPILER_LEXER)")
+    arg_parser.add_argument("--jobs", type=int, default=1,
+                            help="compile source files in parallel across this many worker processes")
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.trace:
+        tracing.configure(args.trace, tracing.StreamSink())
+    if args.lexer:
+        # Set before the pipeline is built; batch worker processes inherit it
+        os.environ["NEW_COMPILER_LEXER"] = args.lexer
+
+    started = time.perf_counter()
+    pipeline = get_pipeline()
+    if args.time:
+        _report_time("setup", "parser tables", time.perf_counter() - started)
+
+    failures = 0
+    paths = list(expand_paths(args.paths, args.pattern))
+    if args.jobs > 1 and not args.emit:
+        failures, paths = process_parallel(paths, args)
+    for path in paths:
+        try:
+            process_file(pipeline, path, args)
+        except Exception as e:
+            failures += 1
+            print(f"{path}: {e}", file=sys.stderr)
+
+    if args.time and len(paths) > 1:
+        _report_time("total", f"{len(paths)} files", time.perf_counter() - started)
+    return 1 if failures else 0
+
+
+def expand_paths(paths, pattern):
+    """Yield files, expanding directories to the files inside them that match the pattern."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if fnmatch.fnmatch(name, pattern):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def process_parallel(paths, args):
+    """Compile source files across a process pool.
+
+    With --compile the workers write the .ncb files themselves; otherwise the
+    compiled programs are run here, in the order the files were given.
+    Returns the number of failures and the paths still to be processed.
+    """
+    sources = [path for path in paths if not path.endswith(".ncb")]
+    remaining = [path for path in paths if path.endswith(".ncb")]
+    failures = 0
+    compiled = {}
+    results = compile_batch(sources, max_workers=args.jobs, write_files=args.compile,
+                            use_cache=not args.no_cache, stream=args.stream)
+    for result in results:
+        if args.time:
+            _report_time(result.path, "compile", result.seconds)
+            if result.report is not None:
+                _report_peephole(result.path, result.report)
+        if not result.ok:
+            failures += 1
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+        elif not args.compile:
+            compiled[result.path] = result.bytecode
+
+    for path in sources:
+        if path not in compiled:
+            continue
+        try:
+            with _StageTimer(path, args.time)("run"):
+                IRExecutor().run(compiled[path], OutputWriter.to_stream())
+        except Exception as e:
+            failures += 1
+            print(f"{path}: {e}", file=sys.stderr)
+    return failures, remaining
+
+
+def process_file(pipeline, path, args):
+    """Compile, emit or run a single file according to the command-line options."""
+    timer = _StageTimer(path, args.time)
+    if path.endswith(".ncb"):
+        with timer("run"):
+            IRExecutor().execute_file(path, output=OutputWriter.to_stream())
+        return
+
+    if args.stream and args.emit != "ast":
+        # Read and lex the file in chunks rather than as one string
+        if args.emit == "tokens":
+            for token in pipeline.tokenize_file(path):
+                print(f"{token.lineno}: {token.type} {token.value!r}")
+            return
+        with timer("parse and generate"):
+            ir_generator = pipeline.generate_file(path)
+        if args.emit == "ir":
+            print(ir_generator.get_ir())
+            return
+        with timer("assemble"):
+            bytecode = pipeline.assemble(ir_generator)
+        if args.time:
+            _report_peephole(path, pipeline.last_report)
+    else:
+        with open(path, "r") as file:
+            code = file.read()
+
+        if args.emit == "tokens":
+            with timer("lex"):
+                tokens = pipeline.tokenize(code)
+            for token in tokens:
+                print(f"{token.lineno}: {token.type} {token.value!r}")
+            return
+
+        if args.emit in ("ast", "ir") or args.time or args.no_cache:
+            # Run the stages one by one so each can be emitted or timed
+            with timer("parse"):
+                ast = pipeline.parse(code)
+            if args.emit == "ast":
+                print(ast)
+                return
+            with timer("generate"):
+                ir_generator = pipeline.generate(ast)
+            if args.emit == "ir":
+                print(ir_generator.get_ir())
+                return
+            with timer("assemble"):
+                bytecode = pipeline.assemble(ir_generator)
+            if args.time:
+                _report_peephole(path, pipeline.last_report)
+        else:
+            bytecode = pipeline.compile(code)
+
+    if args.emit == "bytecode":
+        print(bytecode.disassemble())
+    elif args.compile:
+        output_path = os.path.splitext(path)[0] + ".ncb"
+        with timer("write"):
+            write_bytecode(bytecode, output_path)
+    else:
+        with timer("run"):
+            IRExecutor().run(bytecode, OutputWriter.to_stream())
+
+
+class _StageTimer:
+    """Context manager factory that reports how long each stage took."""
+
+    def __init__(self, path, enabled):
+        self.path = path
+        self.enabled = enabled
+        self.stage = None
+
+    def __call__(self, stage):
+        self.stage = stage
+        return self
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            _report_time(self.path, self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def _report_time(subject, stage, seconds):
+    print(f"[time] {subject}: {stage} {seconds * 1000:.3f} ms", file=sys.stderr)
+
+
+def _report_peephole(subject, report):
+    print(f"[time] {subject}: peephole removed {report.total_removed} of {report.original} "
+          f"instructions, fused {report.fused}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
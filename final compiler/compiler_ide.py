@@ -1,12 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
-import subprocess
-import re
-import keyword
+import queue
+import threading
 from ctypes import windll
-from lexer import Lexer
-from parser import Parser
-from IRGenerator import IRGenerator
+from pipeline import get_pipeline
+from incremental import EditorSession
+from editing import TextChangeProxy, IncrementalHighlighter, LineNumberGutter, DiagnosticsChecker
+from execution import ExecutionService
+from tracing import tracer, DEBUG
+
+RUN_POLL_MS = 50  # How often the Tk thread checks for events from a run.
 
 # Improve DPI awareness on Windows (if supported)
 try:
@@ -25,7 +28,11 @@ class CodeEditorApp:
         self.root.state('zoomed')  # Maximize the window by default.
 
         self.current_file_path = ""  # Track the currently opened file.
-        self.process = None  # Variable for managing the subprocess running Python code.
+        self.execution_service = None  # Worker processes that run programs, started on first run.
+        self.run_thread = None  # Background thread of the current run, if any.
+        self.run_events = None  # Queue of (kind, value) events from the current run.
+        self.cancel_event = None  # Set to cancel the current run.
+        self.session = None  # Tokens and AST of the last run, re-used for the parts not edited since.
 
         # Configure the main layout of the editor.
         self.frame = tk.Frame(root)
@@ -33,30 +40,18 @@ class CodeEditorApp:
 
         self.frame.grid_rowconfigure(0, weight=1)  # Text editor area.
         self.frame.grid_rowconfigure(1, weight=1)  # Output area.
+        self.frame.grid_rowconfigure(2, weight=0)  # Run controls and status.
         self.frame.grid_columnconfigure(1, weight=1)  # Enable resizing of the editor areas.
 
         self.create_widgets()  # Create the editor and output widgets.
         self.create_menu()  # Create the menu bar for file and run options.
         self.apply_theme()  # Apply a dark theme to the UI.
-        self.on_key_release()  # Initialize syntax highlighting and line numbers.
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)  # Stop worker processes on close.
 
     def create_widgets(self):
         """
         Creates the line number display, text editor, and output area.
         """
-        # Line numbers widget.
-        self.line_numbers = self.create_text_widget(
-            width=4,  # Fixed width for line numbers.
-            padx=3,  # Padding for better readability.
-            takefocus=0,  # Prevent focus on the line number widget.
-            border=0,  # Remove border.
-            background="#1e1e2f",  # Background color (dark gray).
-            foreground="#6a6a8c",  # Foreground color (light gray).
-            state='disabled',  # Make the widget read-only.
-            wrap='none'  # Disable text wrapping.
-        )
-        self.line_numbers.grid(row=0, column=0, rowspan=2, sticky='ns')  # Span both rows vertically.
-
         # Main text editor widget.
         self.text_widget = scrolledtext.ScrolledText(
             self.frame,
@@ -67,7 +62,21 @@ class CodeEditorApp:
             insertbackground="#abb2bf"  # Caret color.
         )
         self.text_widget.grid(row=0, column=1, sticky="nsew")  # Fill the first row.
-        self.text_widget.bind("<KeyRelease>", self.on_key_release)  # Trigger updates on key release.
+
+        # Highlight only the lines each edit touches, using the language's lexer.
+        self.change_proxy = TextChangeProxy(self.text_widget)
+        self.highlighter = IncrementalHighlighter(self.text_widget, self.change_proxy)
+
+        # Line numbers, drawn only for the visible lines of the editor.
+        self.line_numbers = LineNumberGutter(
+            self.frame,
+            self.text_widget,
+            self.change_proxy,
+            takefocus=0,  # Prevent focus on the line number gutter.
+            background="#1e1e2f",  # Background color (dark gray).
+            foreground="#6a6a8c"  # Foreground color (light gray).
+        )
+        self.line_numbers.grid(row=0, column=0, sticky='ns')  # Beside the editor.
 
         # Output area widget.
         self.output_text = scrolledtext.ScrolledText(
@@ -80,6 +89,21 @@ class CodeEditorApp:
         self.output_text.grid(row=1, column=1, sticky="nsew")  # Fill the second row.
         self.output_text.tag_configure("error", foreground="#e06c75")  # Configure error messages (red).
 
+        # Run controls and status line.
+        self.controls = tk.Frame(self.frame, background="#1e1e2f")
+        self.controls.grid(row=2, column=0, columnspan=2, sticky="ew")
+        self.run_button = tk.Button(self.controls, text="Run", command=self.run_code)
+        self.run_button.pack(side=tk.LEFT, padx=3, pady=3)
+        self.cancel_button = tk.Button(self.controls, text="Cancel", command=self.cancel_run, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=3, pady=3)
+        self.status_label = tk.Label(self.controls, text="Ready", background="#1e1e2f", foreground="#6a6a8c")
+        self.status_label.pack(side=tk.LEFT, padx=6)
+        self.diagnostics_label = tk.Label(self.controls, text="", background="#1e1e2f", foreground="#e06c75")
+        self.diagnostics_label.pack(side=tk.RIGHT, padx=6)
+
+        # Report every lexical and syntax error, checked in the background once typing pauses.
+        self.diagnostics = DiagnosticsChecker(self.text_widget, self.change_proxy, on_result=self.show_diagnostics)
+
     def create_menu(self):
         """
         Creates the menu bar with File and Run options.
@@ -97,16 +121,11 @@ class CodeEditorApp:
         # Run menu.
         run_menu = tk.Menu(menu_bar, tearoff=False)
         run_menu.add_command(label="Run", command=self.run_code)  # Option to execute the code.
+        run_menu.add_command(label="Cancel", command=self.cancel_run)  # Option to stop the current run.
         menu_bar.add_cascade(label="Run", menu=run_menu)  # Add the Run menu to the menu bar.
 
         self.root.config(menu=menu_bar)  # Set the menu bar as the window's menu.
 
-    def create_text_widget(self, **kwargs):
-        """
-        Helper method to create text widgets with the provided properties.
-        """
-        return tk.Text(self.frame, **kwargs)
-
     def apply_theme(self):
         """
         Applies a dark theme to the text editor and output area.
@@ -120,7 +139,7 @@ class CodeEditorApp:
             background="#21252b",  # Darker background for the output.
             foreground="#98c379"  # Green text for output.
         )
-        self.line_numbers.configure(
+        self.line_numbers.set_colors(
             background="#1e1e2f",  # Dark gray background for line numbers.
             foreground="#6a6a8c"  # Light gray text for line numbers.
         )
@@ -135,8 +154,6 @@ class CodeEditorApp:
                 self.text_widget.delete('1.0', tk.END)  # Clear the editor.
                 self.text_widget.insert('1.0', file.read())  # Load the file's content.
             self.current_file_path = file_path  # Update the current file path.
-            self.update_line_numbers()  # Refresh line numbers.
-            self.on_key_release()  # Reapply syntax highlighting.
 
     def save_file(self):
         """
@@ -153,119 +170,147 @@ class CodeEditorApp:
         """
         Exits the application.
         """
+        self.cancel_run()  # Stop any run in progress.
+        self.diagnostics.close()  # Stop the diagnostics worker.
+        if self.execution_service is not None:
+            self.execution_service.close()  # Stop the worker processes.
         self.root.destroy()  # Close the application window.
 
     def run_code(self):
         """
-        Runs the Python code in the editor and displays the output or errors.
+        Starts compiling and running the code in the editor on a background thread.
         """
+        if self.run_thread is not None:  # Only one run at a time.
+            return
         code = self.text_widget.get('1.0', tk.END).strip()  # Get the code from the editor.
         if not code:  # If the editor is empty, show a warning.
             messagebox.showwarning("Run", "Editor is empty. Please write some code.")
             return
 
-        # Create lexer, parser, and IR generator instances
-        lexer = Lexer()
-        parser = Parser()
-        ir_generator = IRGenerator()
-
-        # Tokenize the input code
-        lexer.lexer.input(code)
-        print("Tokens:")
-        tokens = []
-        for token in lexer.lexer:
-            print(token)
-            tokens.append(token)
-
-        # Parse the code and generate AST
-        try:
-            ast = parser.parse(code)
-            print("\nAST:")
-            print(ast)
-        except SyntaxError as e:
-            print(f"Syntax error: {e}")
-            return
-
-        # Generate IR from AST
-        ir_generator.generate(ast)
-        print("\nGenerated IR:")
-        print(ir_generator.get_ir())
-        try:
-            # Execute the code using a subprocess and capture stdout and stderr.
-            process = subprocess.Popen(
-                ["python", "-c", code],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate()
-
-            # Display the output and errors in the output area.
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete('1.0', tk.END)  # Clear the output area.
-            if stdout:
-                self.output_text.insert(tk.END, stdout)  # Insert standard output.
-            if stderr:
-                self.output_text.insert(tk.END, stderr, "error")  # Insert errors in red.
-            self.output_text.config(state=tk.DISABLED)
-        except Exception as e:
-            # Display unexpected errors in the output area.
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete('1.0', tk.END)
-            self.output_text.insert(tk.END, f"Error: {str(e)}", "error")
-            self.output_text.config(state=tk.DISABLED)
+        self.output_text.config(state=tk.NORMAL)
+        self.output_text.delete('1.0', tk.END)  # Clear the output area.
+        self.output_text.config(state=tk.DISABLED)
+
+        # The worker thread reports through the event queue; the Tk thread polls it.
+        self.run_events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.run_thread = threading.Thread(
+            target=self.run_pipeline,
+            args=(code, self.get_execution_service(), self.run_events, self.cancel_event),
+            daemon=True
+        )
+        self.run_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.run_thread.start()
+        self.root.after(RUN_POLL_MS, self.poll_run_events)
 
-    def update_line_numbers(self, event=None):
-        """
-        Updates the line numbers based on the content in the editor.
+    def cancel_run(self):
         """
-        self.line_numbers.config(state=tk.NORMAL)
-        self.line_numbers.delete('1.0', tk.END)  # Clear existing line numbers.
-        lines = self.text_widget.get('1.0', 'end-1c').split('\n')  # Get the current lines.
-        for i, _ in enumerate(lines, start=1):  # Enumerate line numbers.
-            self.line_numbers.insert(tk.END, f"{i}\n")  # Insert line numbers.
-        self.line_numbers.config(state=tk.DISABLED)
-
-    def highlight_comments(self):
+        Cancels the current run; a running program is stopped mid-execution.
         """
-        Highlights comments in the code.
-        """
-        self.apply_highlight(r"#.*", "comment", "#7f848e", ("Consolas", 11, "italic"))
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
 
-    def highlight_strings(self):
+    def run_pipeline(self, code, service, events, cancel):
         """
-        Highlights string literals in the code.
+        Compiles and runs code off the Tk thread. Never touches widgets; every
+        update is put on the events queue as a (kind, value) pair.
         """
-        pattern = r"(['\"].*?['\"]|'''[\s\S]*?'''|\"\"\"[\s\S]*?\"\"\")"
-        self.apply_highlight(pattern, "string", "#e5c07b", ("Consolas", 11, "italic"))
+        try:
+            # Lexer and parser tables are built once per process and reused
+            pipeline = get_pipeline()
+
+            # Tokenize the input code; stage outputs are only built when tracing is on
+            if tracer.enabled(DEBUG):
+                tokens = pipeline.tokenize(code)
+                tracer.emit(DEBUG, "tokens", "\n".join(str(token) for token in tokens))
+
+            # Parse the code and generate AST, re-parsing only what changed since the last run
+            events.put(("progress", "Parsing..."))
+            if self.session is None:
+                self.session = EditorSession(pipeline)
+            ast = self.session.update(code)
+            if tracer.enabled(DEBUG):
+                tracer.emit(DEBUG, "ast", repr(ast))
+
+            # Generate IR from AST
+            if cancel.is_set():
+                return
+            events.put(("progress", "Generating IR..."))
+            ir_generator = pipeline.generate(ast)
+            if tracer.enabled(DEBUG):
+                tracer.emit(DEBUG, "ir", ir_generator.get_ir())
+
+            if cancel.is_set():
+                return
+            events.put(("progress", "Optimizing..."))
+            bytecode = pipeline.assemble(ir_generator)
+
+            # Execute the bytecode on a warm worker process, streaming its output back.
+            if cancel.is_set():
+                return
+            events.put(("progress", "Running..."))
+            result = service.run(bytecode, cancel=cancel,
+                                 on_output=lambda chunk: events.put(("output", chunk)))
+            if result.error and not cancel.is_set():
+                events.put(("error", result.error))
+        except SyntaxError as e:
+            events.put(("error", f"Syntax error: {e}"))
+        except Exception as e:
+            events.put(("error", f"Error: {str(e)}"))
+        finally:
+            events.put(("done", None))
 
-    def highlight_keywords(self):
+    def poll_run_events(self):
         """
-        Highlights Python keywords in the code.
+        Applies queued run events to the UI; reschedules itself until the run is done.
         """
-        for kw in keyword.kwlist:
-            pattern = rf'\b{kw}\b'
-            self.apply_highlight(pattern, "keyword", "#61afef", ("Consolas", 11, "bold"))
+        done = False
+        self.output_text.config(state=tk.NORMAL)
+        while True:
+            try:
+                kind, value = self.run_events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.status_label.config(text=value)
+            elif kind == "output":
+                self.output_text.insert(tk.END, value)  # Insert program output.
+            elif kind == "error":
+                self.output_text.insert(tk.END, value, "error")  # Insert errors in red.
+            elif kind == "done":
+                done = True
+        self.output_text.see(tk.END)
+        self.output_text.config(state=tk.DISABLED)
+
+        if not done:
+            self.root.after(RUN_POLL_MS, self.poll_run_events)
+            return
+        self.status_label.config(text="Cancelled" if self.cancel_event.is_set() else "Finished")
+        self.run_thread = None
+        self.cancel_event = None
+        self.run_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
 
-    def apply_highlight(self, pattern, tag_name, color, font):
+    def show_diagnostics(self, diagnostics):
         """
-        Applies syntax highlighting based on a pattern and style.
+        Summarizes the latest diagnostics below the editor; the errors themselves are underlined.
         """
-        self.text_widget.tag_remove(tag_name, "1.0", tk.END)  # Remove existing highlights for the tag.
-        for match in re.finditer(pattern, self.text_widget.get("1.0", tk.END)):  # Find matches using regex.
-            start = f"1.0+{match.start()}c"  # Calculate start position.
-            end = f"1.0+{match.end()}c"  # Calculate end position.
-            self.text_widget.tag_add(tag_name, start, end)  # Add the tag to the matched text.
-        self.text_widget.tag_configure(tag_name, foreground=color, font=font)  # Configure tag style.
-
-    def on_key_release(self, event=None):
+        if not diagnostics:
+            self.diagnostics_label.config(text="")
+        elif len(diagnostics) == 1:
+            self.diagnostics_label.config(text=str(diagnostics[0]))
+        else:
+            self.diagnostics_label.config(text=f"{diagnostics[0]} (+{len(diagnostics) - 1} more)")
+
+    def get_execution_service(self):
         """
-        Handles key release events to update syntax highlighting and line numbers.
+        Returns the execution service, starting its worker processes on first use.
         """
-        self.highlight_comments()  # Highlight comments.
-        self.highlight_strings()  # Highlight strings.
-        self.highlight_keywords()  # Highlight keywords.
-        self.update_line_numbers()  # Update line numbers.
+        if self.execution_service is None:
+            self.execution_service = ExecutionService()
+        return self.execution_service
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+from pipeline import get_pipeline
+
+# --- Diagnostics ---
+# Reports every lexical and syntax error in a program in one pass, instead of
+# stopping at the first one as compiling does.
+
+LEXICAL = "lexical"
+SYNTAX = "syntax"
+
+
+class Diagnostic:
+    def __init__(self, kind, message, line, column, offset, length):
+        self.kind = kind  # LEXICAL or SYNTAX
+        self.message = message
+        self.line = line  # 1-based
+        self.column = column  # 1-based
+        self.offset = offset  # Character offset in the source
+        self.length = length  # Characters covered, at least 1 where the source has any
+
+    def __repr__(self):
+        return f"Diagnostic({self.kind!r}, {self.message!r}, line={self.line}, column={self.column})"
+
+    def __str__(self):
+        return f"{self.line}:{self.column}: {self.kind} error: {self.message}"
+
+
+def collect_diagnostics(code, pipeline=None):
+    """Lex and parse code, recovering from errors, and return its diagnostics in source order."""
+    pipeline = pipeline if pipeline is not None else get_pipeline()
+    illegal = []
+
+    def skip_illegal(token):
+        illegal.append(token.lexpos)
+        token.lexer.skip(1)
+
+    lexer = pipeline.lexer.lexer.clone()
+    lexer.lexerrorf = skip_illegal
+    lexer.lineno = 1
+    lexer.input(code)
+    tokens = []
+    ends = {}  # Token start offset -> end offset
+    for token in lexer:
+        tokens.append(token)
+        ends[token.lexpos] = lexer.lexpos
+
+    diagnostics = [_diagnostic(code, LEXICAL, f"Illegal character '{code[offset]}'", offset, 1)
+                   for offset in illegal]
+    for token in pipeline.find_syntax_errors(tokens):
+        if token is None:
+            offset = len(code.rstrip())
+            diagnostics.append(_diagnostic(code, SYNTAX, "Unexpected end of file", max(offset - 1, 0),
+                                           1 if offset else 0))
+        else:
+            diagnostics.append(_diagnostic(code, SYNTAX, f"Unexpected token '{token.value}' (type: {token.type})",
+                                           token.lexpos, ends[token.lexpos] - token.lexpos))
+    diagnostics.sort(key=lambda diagnostic: diagnostic.offset)
+    return diagnostics
+
+
+def _diagnostic(code, kind, message, offset, length):
+    line_start = code.rfind("\n", 0, offset) + 1
+    return Diagnostic(kind, message, code.count("\n", 0, offset) + 1, offset - line_start + 1, offset, length)
@@ -0,0 +1,322 @@
+import re
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from lexer import Lexer
+from diagnostics import collect_diagnostics
+
+# --- Text Change Proxy ---
+# Tk's Text widget has no event that says which lines an edit touched. The
+# proxy renames the widget's Tcl command and stands in for it, so every insert
+# and delete passes through here, on its way to the widget, with its indexes.
+
+class TextChangeProxy:
+    """Reports the lines changed by each edit of a Tk Text widget.
+
+    Listeners are called as listener(first, last, delta) after each edit:
+    lines first..last (1-based, inclusive) now hold changed text and delta
+    lines were added (or removed, when negative) at first. first is None when
+    the change cannot be located, as after undo or redo.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.listeners = []
+        self.original = widget._w + "_original"
+        widget.tk.call("rename", widget._w, self.original)
+        widget.tk.createcommand(widget._w, self._dispatch)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _dispatch(self, command, *args):
+        call = self.widget.tk.call
+        if command == "insert":
+            first = self._line(args[0])
+            result = call((self.original, command) + args)
+            added = "".join(args[1::2]).count("\n")  # Text and tag lists alternate
+            self._notify(first, first + added, added)
+        elif command == "delete":
+            first = self._line(args[0])
+            last = self._line(args[1]) if len(args) > 1 else first
+            result = call((self.original, command) + args)
+            self._notify(first, first, first - last)
+        elif command == "replace":
+            first, last = self._line(args[0]), self._line(args[1])
+            result = call((self.original, command) + args)
+            added = "".join(args[2::2]).count("\n")
+            self._notify(first, first + added, added - (last - first))
+        elif command == "edit" and args and args[0] in ("undo", "redo"):
+            result = call((self.original, command) + args)
+            self._notify(None, None, None)
+        else:
+            result = call((self.original, command) + args)
+        return result
+
+    def _line(self, index):
+        return int(str(self.widget.tk.call(self.original, "index", index)).split(".")[0])
+
+    def _notify(self, first, last, delta):
+        for listener in self.listeners:
+            listener(first, last, delta)
+
+
+# --- Incremental Highlighter ---
+# Token types are classified by the language's own Lexer, so highlighting
+# always agrees with what the compiler sees. Text the lexer skips is either
+# blank, a comment or an illegal character; the comment patterns are taken
+# from the lexer's rules.
+
+TOKEN_TAGS = {
+    "TT_if": "keyword", "TT_elif": "keyword", "TT_else": "keyword", "TT_while": "keyword",
+    "TT_for": "keyword", "TT_in": "keyword", "TT_print": "keyword",
+    "TT_string": "string",
+    "TT_int": "number", "TT_float": "number",
+}
+
+TAG_STYLES = {
+    "keyword": {"foreground": "#61afef", "font": ("Consolas", 11, "bold")},
+    "string": {"foreground": "#e5c07b", "font": ("Consolas", 11, "italic")},
+    "number": {"foreground": "#d19a66"},
+    "comment": {"foreground": "#7f848e", "font": ("Consolas", 11, "italic")},
+    "illegal": {"foreground": "#e06c75", "underline": True},
+}
+
+_SKIPPED = re.compile(
+    f"(?P<comment>{Lexer.t_singleline_comment.__doc__}|{Lexer.t_multiline_comment.__doc__})|(?P<illegal>\\S)")
+
+
+class IncrementalHighlighter:
+    """Re-highlights only the lines touched by edits, after a short pause in typing.
+
+    Each line is lexed on its own. The language has no multi-line tokens
+    apart from strings with embedded newlines, which are shown as illegal
+    quote characters until they are closed on one line.
+    """
+
+    def __init__(self, widget, proxy, delay_ms=75):
+        self.widget = widget
+        self.delay_ms = delay_ms  # Debounce delay after the last edit
+        self.lexer = Lexer(report_errors=False).lexer
+        self.dirty = None  # (first, last) lines awaiting highlighting
+        self.pending = None  # after() id of the scheduled update
+        for tag, style in TAG_STYLES.items():
+            widget.tag_configure(tag, **style)
+        proxy.add_listener(self.on_change)
+
+    def on_change(self, first, last, delta):
+        if first is None:
+            self.mark_all()
+            return
+        if self.dirty is not None and delta:
+            # Queued lines were numbered before this edit; move them with their text
+            self.dirty = (_shift_line(self.dirty[0], first, delta), _shift_line(self.dirty[1], first, delta))
+        self.mark_dirty(first, last)
+
+    def mark_all(self):
+        self.mark_dirty(1, self.line_count())
+
+    def mark_dirty(self, first, last):
+        """Queue lines first..last for highlighting and restart the debounce timer."""
+        if self.dirty is not None:
+            first, last = min(first, self.dirty[0]), max(last, self.dirty[1])
+        self.dirty = (first, last)
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+        self.pending = self.widget.after(self.delay_ms, self.flush)
+
+    def flush(self):
+        """Highlight the queued lines now."""
+        self.pending = None
+        if self.dirty is None:
+            return
+        first, last = self.dirty
+        self.dirty = None
+        last = min(last, self.line_count())  # Lines may have been deleted since they were queued
+        for line in range(first, last + 1):
+            self.highlight_line(line)
+
+    def highlight_line(self, line):
+        start, end = f"{line}.0", f"{line}.end"
+        for tag in TAG_STYLES:
+            self.widget.tag_remove(tag, start, end)
+        text = self.widget.get(start, end)
+        lexer = self.lexer
+        lexer.input(text)
+        position = 0
+        for token in lexer:
+            self._highlight_skipped(line, text, position, token.lexpos)
+            tag = TOKEN_TAGS.get(token.type)
+            if tag is not None:
+                self.widget.tag_add(tag, f"{line}.{token.lexpos}", f"{line}.{lexer.lexpos}")
+            position = lexer.lexpos
+        self._highlight_skipped(line, text, position, len(text))
+
+    def _highlight_skipped(self, line, text, start, end):
+        """Tag comments and illegal characters in text the lexer skipped."""
+        for match in _SKIPPED.finditer(text, start, end):
+            self.widget.tag_add(match.lastgroup, f"{line}.{match.start()}", f"{line}.{match.end()}")
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split(".")[0])
+
+
+def _shift_line(line, first, delta):
+    """Return where a line numbered before an edit is after delta lines were added or removed at first."""
+    if line <= first:
+        return line
+    return max(line + delta, first)  # Lines a deletion removed collapse onto first
+
+
+# --- Line Number Gutter ---
+# Draws numbers only for the lines in view, so the cost of an update depends
+# on the window height rather than the document length. Canvas text items are
+# reused from one update to the next.
+
+class LineNumberGutter(tk.Canvas):
+    """Line-number gutter for a Text widget, redrawn on edits, scrolling and resizing."""
+
+    def __init__(self, master, widget, proxy, foreground="#6a6a8c", font=("Consolas", 11), padding=6, **options):
+        super().__init__(master, highlightthickness=0, borderwidth=0, **options)
+        self.widget = widget
+        self.foreground = foreground
+        self.font = font
+        self.padding = padding  # Pixels on either side of the numbers
+        self.items = []  # Canvas text items, one per visible line
+        self.digits = 0  # Digits the current width was sized for
+        self.pending = None  # after_idle() id of the scheduled redraw
+
+        # Chain the widget's scroll callback, normally its scrollbar's set
+        self.scroll_command = widget.cget("yscrollcommand")
+        widget.configure(yscrollcommand=self.on_scroll)
+        widget.bind("<Configure>", self.schedule, add="+")
+        proxy.add_listener(self.on_change)
+        self.schedule()
+
+    def set_colors(self, background, foreground):
+        self.configure(background=background)
+        self.foreground = foreground
+        for item in self.items:
+            self.itemconfigure(item, fill=foreground)
+
+    def on_scroll(self, first, last):
+        if self.scroll_command:
+            self.tk.call(*self.tk.splitlist(self.scroll_command), first, last)
+        self.schedule()
+
+    def on_change(self, first, last, delta):
+        self.schedule()  # An edit can shift or rewrap the lines in view
+
+    def schedule(self, event=None):
+        """Redraw once the current burst of edit and scroll events is over."""
+        if self.pending is None:
+            self.pending = self.after_idle(self.redraw)
+
+    def redraw(self):
+        self.pending = None
+        self._fit_width(int(self.widget.index("end-1c").split(".")[0]))
+        x = int(self.cget("width")) - self.padding
+        used = 0
+        index = self.widget.index("@0,0")  # First visible line
+        while True:
+            info = self.widget.dlineinfo(index)
+            if info is None:  # Below the bottom of the view
+                break
+            line = index.split(".")[0]
+            if used < len(self.items):
+                item = self.items[used]
+                self.coords(item, x, info[1])
+                self.itemconfigure(item, text=line)
+            else:
+                self.items.append(self.create_text(x, info[1], anchor="ne", text=line,
+                                                   font=self.font, fill=self.foreground))
+            used += 1
+            next_index = self.widget.index(f"{line}.0+1line")
+            if next_index.split(".")[0] == line:  # Last line of the document
+                break
+            index = next_index
+        for item in self.items[used:]:
+            self.delete(item)
+        del self.items[used:]
+
+    def _fit_width(self, line_count):
+        digits = max(len(str(line_count)), 2)
+        if digits != self.digits:
+            self.digits = digits
+            width = self.tk.call("font", "measure", self.font, "0" * digits)
+            self.configure(width=int(width) + 2 * self.padding)
+
+
+# --- Background Diagnostics ---
+# Checks the document for every lexical and syntax error once typing pauses.
+# The check runs on a single worker thread; the Tk thread only starts checks
+# and polls for their results, so typing is never blocked by it.
+
+class DiagnosticsChecker:
+    """Underlines the errors of a Text widget's document, re-checked after each pause in editing.
+
+    on_result, if given, is called on the Tk thread with each new list of Diagnostics.
+    """
+
+    def __init__(self, widget, proxy, on_result=None, delay_ms=300, poll_ms=50):
+        self.widget = widget
+        self.on_result = on_result
+        self.delay_ms = delay_ms  # Debounce delay after the last edit
+        self.poll_ms = poll_ms  # How often a running check is polled
+        self.worker = ThreadPoolExecutor(max_workers=1)
+        self.pending = None  # after() id of the scheduled check
+        self.future = None  # The latest check; results of earlier ones are dropped
+        self.polling = False
+        self.diagnostics = []
+        widget.tag_configure("diagnostic", underline=True, background="#4b2c30")
+        proxy.add_listener(self.on_change)
+
+    def on_change(self, first, last, delta):
+        self.schedule()
+
+    def schedule(self):
+        """Check the document once no edit has happened for delay_ms."""
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+        self.pending = self.widget.after(self.delay_ms, self.start)
+
+    def start(self):
+        self.pending = None
+        if self.future is not None:
+            self.future.cancel()  # Drops a queued check; a running one is left to finish and ignored
+        code = self.widget.get("1.0", "end-1c")
+        if not code.strip():
+            self.future = None
+            self.show([])
+            return
+        self.future = self.worker.submit(collect_diagnostics, code)
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.poll_ms, self.poll)
+
+    def poll(self):
+        future = self.future
+        if future is None:
+            self.polling = False
+            return
+        if not future.done():
+            self.widget.after(self.poll_ms, self.poll)
+            return
+        self.polling = False
+        self.future = None
+        try:
+            diagnostics = future.result()
+        except Exception:
+            return  # The compiler itself failed; keep the last diagnostics
+        self.show(diagnostics)
+
+    def show(self, diagnostics):
+        self.diagnostics = diagnostics
+        self.widget.tag_remove("diagnostic", "1.0", tk.END)
+        for diagnostic in diagnostics:
+            start = f"{diagnostic.line}.{diagnostic.column - 1}"
+            self.widget.tag_add("diagnostic", start, f"{start}+{max(diagnostic.length, 1)}c")
+        if self.on_result is not None:
+            self.on_result(diagnostics)
+
+    def close(self):
+        self.worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,194 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from IRExecutor import IRExecutor
+from output import OutputWriter
+
+try:
+    import resource  # Unix only; memory limits are not enforced without it
+except ImportError:
+    resource = None
+
+# --- Execution Service ---
+# A warm pool of worker processes, each hosting an IRExecutor. Programs are
+# sent as Bytecode or text IR, so no interpreter is started per run, and every
+# job runs under instruction-count, memory and wall-clock limits. A worker
+# that overruns its wall-clock limit, or whose job is cancelled, is killed
+# and replaced.
+
+_POLL_INTERVAL = 0.05  # Seconds between checks for cancellation while a job runs
+_OUTPUT_INTERVAL = 0.05  # Seconds a worker may hold back buffered output
+
+
+class ExecutionResult:
+    def __init__(self, output="", error=None, seconds=0.0):
+        self.output = output  # Printed output, including any produced before an error
+        self.error = error  # Error message when the program failed or hit a limit
+        self.seconds = seconds  # Wall-clock time of the job, as seen by the service
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"ExecutionResult({status}, seconds={self.seconds:.4f})"
+
+
+class ExecutionService:
+    """Runs programs in a pool of sandboxed worker processes.
+
+    The limits given here are the defaults for every job; run() and submit()
+    can override them per job. memory_limit is the address-space limit of the
+    worker in bytes and is only enforced where the resource module exists.
+    """
+
+    def __init__(self, workers=2, max_instructions=10_000_000, memory_limit=None, time_limit=10.0):
+        self.max_instructions = max_instructions
+        self.memory_limit = memory_limit
+        self.time_limit = time_limit  # Seconds
+        self.context = multiprocessing.get_context("spawn")  # Workers never inherit Tk or thread state
+        self.idle = queue.Queue()  # Workers waiting for a job
+        self.workers = []
+        self.lock = threading.Lock()
+        self.closed = False
+        self.dispatcher = ThreadPoolExecutor(max_workers=workers)  # Backs submit()
+        for _ in range(workers):
+            self.idle.put(self._start_worker())
+
+    def run(self, program, max_instructions=None, memory_limit=None, time_limit=None,
+            on_output=None, cancel=None):
+        """Execute a program on an idle worker and return an ExecutionResult.
+
+        Blocks until a worker is free and the job has finished or been stopped.
+        Output is streamed back while the program runs; on_output, if given, is
+        called with each chunk. Setting the cancel event (a threading.Event)
+        stops the job by killing its worker.
+        """
+        if self.closed:
+            raise Exception("Execution service is closed")
+        max_instructions = max_instructions if max_instructions is not None else self.max_instructions
+        memory_limit = memory_limit if memory_limit is not None else self.memory_limit
+        time_limit = time_limit if time_limit is not None else self.time_limit
+
+        worker = self.idle.get()
+        started = time.perf_counter()
+        deadline = started + time_limit if time_limit is not None else None
+        chunks = []
+        try:
+            worker.connection.send((program, max_instructions, memory_limit))
+            while True:
+                error = None
+                if cancel is not None and cancel.is_set():
+                    error = "Execution cancelled"
+                elif deadline is not None and time.perf_counter() >= deadline:
+                    error = f"Time limit of {time_limit}s exceeded"
+                if error is not None:
+                    self._replace(worker)
+                    worker = None
+                    return ExecutionResult("".join(chunks), error, time.perf_counter() - started)
+
+                wait = _POLL_INTERVAL
+                if deadline is not None:
+                    wait = max(0.0, min(wait, deadline - time.perf_counter()))
+                if not worker.connection.poll(wait):
+                    continue
+                kind, value = worker.connection.recv()
+                if kind == "output":
+                    chunks.append(value)
+                    if on_output is not None:
+                        on_output(value)
+                else:
+                    return ExecutionResult("".join(chunks), value, time.perf_counter() - started)
+        except (EOFError, OSError):
+            # The worker died, for instance when the memory limit stopped it mid-allocation
+            self._replace(worker)
+            worker = None
+            return ExecutionResult("".join(chunks), "Worker process exited unexpectedly",
+                                   time.perf_counter() - started)
+        finally:
+            if worker is not None:
+                self.idle.put(worker)
+
+    def submit(self, program, **limits):
+        """Schedule a program for execution, returning a Future of its ExecutionResult."""
+        return self.dispatcher.submit(self.run, program, **limits)
+
+    def close(self):
+        """Stop every worker process."""
+        self.closed = True
+        self.dispatcher.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.process.kill()
+            worker.process.join()
+            worker.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _start_worker(self):
+        connection, worker_connection = self.context.Pipe()
+        process = self.context.Process(target=_worker_main, args=(worker_connection,), daemon=True)
+        process.start()
+        worker_connection.close()
+        worker = _Worker(process, connection)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        """Kill a worker that overran or died and put a fresh one in the pool."""
+        worker.process.kill()
+        worker.process.join()
+        worker.connection.close()
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        if not self.closed:
+            self.idle.put(self._start_worker())
+
+
+class _Worker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+
+
+def _worker_main(connection):
+    """Worker loop: receive (program, max_instructions, memory_limit) jobs.
+
+    Output is sent back as ("output", chunk) messages while the program runs,
+    followed by a single ("done", error) message.
+    """
+    base_limit = resource.getrlimit(resource.RLIMIT_AS) if resource is not None else None
+    while True:
+        try:
+            program, max_instructions, memory_limit = connection.recv()
+        except EOFError:
+            return
+        output = OutputWriter(lambda chunk: connection.send(("output", chunk)),
+                              flush_interval=_OUTPUT_INTERVAL)
+        error = None
+        try:
+            if memory_limit is not None and resource is not None:
+                resource.setrlimit(resource.RLIMIT_AS, (memory_limit, base_limit[1]))
+            executor = IRExecutor(max_instructions=max_instructions)
+            executor.execute(program, output)
+        except MemoryError:
+            error = "Memory limit exceeded"
+        except Exception as e:
+            error = str(e)
+        finally:
+            if memory_limit is not None and resource is not None:
+                resource.setrlimit(resource.RLIMIT_AS, base_limit)
+        # Drop the executor's registers and variables before the next job
+        executor = None
+        connection.send(("done", error))
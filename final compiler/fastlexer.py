@@ -0,0 +1,270 @@
+import re
+import sys
+import time
+from ply.lex import LexToken
+from lexer import Lexer
+
+# --- Fast Lexer ---
+# A hand-written alternative to PLY's lexer that produces the same tokens.
+# The whole buffer is classified in one str.translate call; the scanner then
+# dispatches on the class of the character at each token start and matches
+# only the rule that class can begin. Tokens are collected into parallel
+# lists rather than one object per token. Files can also be tokenized in
+# chunks, without reading them whole.
+#
+# The rules are Lexer's own regexes, tried in the order PLY tries them:
+# function rules first, in definition order, then longer operators before
+# shorter ones.
+
+_SPACE, _NEWLINE, _LETTER, _DIGIT, _DOT, _QUOTE, _HASH, _SLASH, _OPERATOR, _OTHER = "snldqQhxoz"
+
+
+class _CharClasses(dict):
+    """str.translate table mapping each character to its class letter."""
+
+    def __missing__(self, code):
+        return _OTHER
+
+
+_CLASS_MAP = _CharClasses()
+for _char in " \t":
+    _CLASS_MAP[ord(_char)] = _SPACE
+_CLASS_MAP[ord("\n")] = _NEWLINE
+for _char in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    _CLASS_MAP[ord(_char)] = _LETTER
+for _char in "0123456789":
+    _CLASS_MAP[ord(_char)] = _DIGIT
+_CLASS_MAP[ord(".")] = _DOT
+_CLASS_MAP[ord('"')] = _QUOTE
+_CLASS_MAP[ord("#")] = _HASH
+_CLASS_MAP[ord("/")] = _SLASH
+for _char in "+-*=<>()[],:":
+    _CLASS_MAP[ord(_char)] = _OPERATOR
+
+_SPACES = re.compile(r"[ \t]+")
+_NEWLINES = re.compile(Lexer.t_newline.__doc__)
+_IDENTIFIER = re.compile(Lexer.t_TT_identifier.__doc__)
+_NUMBER = re.compile(f"(?P<float>{Lexer.t_TT_float.__doc__})|{Lexer.t_TT_int.__doc__}", re.VERBOSE)
+_STRING = re.compile(Lexer.t_TT_string.__doc__, re.VERBOSE)
+_STRING_BODY = re.compile(r'[^"\\]*(\\.[^"\\]*)*')  # _STRING between its quotes
+_BLOCK_COMMENT = re.compile(Lexer.t_multiline_comment.__doc__)
+
+_OPERATORS = {
+    "+": "TT_plus", "-": "TT_sub", "*": "TT_mul", "/": "TT_div",
+    "=": "TT_equ", "<": "TT_less", ">": "TT_greater",
+    "(": "TT_lparen", ")": "TT_rparen", "[": "TT_lbracket", "]": "TT_rbracket",
+    ",": "TT_comma", ":": "TT_colon",
+}
+_DOUBLE_OPERATORS = {"==": "TT_dequ", "<=": "TT_leq", ">=": "TT_geq", "**": "TT_pow"}
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Characters read per chunk by scan_file
+
+
+class TokenArrays:
+    """Tokens as parallel lists; iterating yields PLY LexTokens for the parser."""
+
+    def __init__(self, types, values, positions, lines, illegal, end_line):
+        self.types = types
+        self.values = values
+        self.positions = positions  # Offset of each token in the source
+        self.lines = lines  # Line number of each token, counted as PLY counts them
+        self.illegal = illegal  # Offsets of skipped illegal characters
+        self.end_line = end_line  # Line number at the end of the scanned text
+
+    def __len__(self):
+        return len(self.types)
+
+    def token(self, index):
+        token = LexToken()
+        token.type = self.types[index]
+        token.value = self.values[index]
+        token.lineno = self.lines[index]
+        token.lexpos = self.positions[index]
+        return token
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self.token(index)
+
+
+class FastLexer:
+    def __init__(self, report_errors=True):
+        self.report_errors = report_errors  # Print illegal characters, as Lexer does
+
+    def tokenize(self, text, lineno=1):
+        """Tokenize text in a single pass and return its TokenArrays."""
+        tokens = self._scan(text, lineno, 0)
+        self._report(text, 0, tokens.illegal)
+        return tokens
+
+    def scan_file(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Tokenize a file chunk by chunk, yielding TokenArrays with offsets into the whole file.
+
+        Only about one chunk of source text is held at a time. Each chunk is
+        cut after its last newline, and the rest is carried into the next
+        one: apart from strings, no token spans a newline. A string that does
+        shows up as an unmatched quote; the tokens before it are yielded and
+        the text from the quote on is carried over, while only the new text
+        of each chunk is searched for the string's end. An unterminated
+        string is therefore carried, but not re-scanned, to the end of file.
+        """
+        offset = 0  # File offset of the start of buffer
+        lineno = 1
+        buffer = ""
+        resume = None  # Where to continue searching for the end of a string that opens buffer
+        floor = 0  # The cut must come after this: the end of a carried string
+        with open(path, "r") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                buffer += chunk
+                if resume is not None and chunk:
+                    stop = _STRING_BODY.match(buffer, resume).end()
+                    if stop == len(buffer) or (stop == len(buffer) - 1 and buffer[stop] == "\\"):
+                        resume = stop
+                        continue  # Still open; read more
+                    resume = None
+                    floor = stop  # The closing quote, or a backslash-newline that leaves it unterminated
+                if not chunk:
+                    cut = len(buffer)
+                else:
+                    cut = buffer.rfind("\n") + 1
+                    if cut <= floor:
+                        continue  # A line longer than the chunk; read more
+                text = buffer[:cut] if cut < len(buffer) else buffer
+                tokens = self._scan(text, lineno, offset)
+                quote = self._open_string(text, offset, tokens.illegal) if chunk else None
+                if quote is not None:  # A string may continue in the next chunk
+                    cut = quote - offset
+                    text = text[:cut]
+                    tokens = self._scan(text, lineno, offset)
+                    resume = 1
+                self._report(text, offset, tokens.illegal)
+                yield tokens
+                if not chunk:
+                    return
+                buffer = buffer[cut:]
+                offset += cut
+                lineno = tokens.end_line
+                floor = 0
+
+    def tokenize_file(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield the LexTokens of a file as it is read, for Parser.parse_tokens."""
+        for tokens in self.scan_file(path, chunk_size):
+            yield from tokens
+
+    def _scan(self, text, lineno, offset):
+        types, values, positions, lines, illegal = [], [], [], [], []
+        add_type, add_value, add_position, add_line = types.append, values.append, positions.append, lines.append
+        keywords = Lexer.keywords
+        classes = text.translate(_CLASS_MAP)
+        end = len(text)
+        pos = 0
+        while pos < end:
+            kind = classes[pos]
+            if kind == _SPACE:
+                pos = _SPACES.match(text, pos).end()
+                continue
+            if kind == _NEWLINE:
+                stop = _NEWLINES.match(text, pos).end()
+                lineno += stop - pos
+                pos = stop
+                continue
+            if kind == _LETTER:
+                match = _IDENTIFIER.match(text, pos)
+                word = match.group()
+                token_type = keywords.get(word, "TT_identifier")
+                value = word
+                stop = match.end()
+            elif kind == _DIGIT or kind == _DOT:
+                match = _NUMBER.match(text, pos)
+                if match is None:  # A dot that does not start a number
+                    illegal.append(pos + offset)
+                    pos += 1
+                    continue
+                if match.group("float") is not None:
+                    token_type, value = "TT_float", float(match.group())
+                else:
+                    token_type, value = "TT_int", int(match.group())
+                stop = match.end()
+            elif kind == _OPERATOR:
+                pair = text[pos:pos + 2]
+                if pair in _DOUBLE_OPERATORS:
+                    token_type, value, stop = _DOUBLE_OPERATORS[pair], pair, pos + 2
+                else:
+                    value = text[pos]
+                    token_type, stop = _OPERATORS[value], pos + 1
+            elif kind == _QUOTE:
+                match = _STRING.match(text, pos)
+                if match is None:  # Unterminated string
+                    illegal.append(pos + offset)
+                    pos += 1
+                    continue
+                token_type, value, stop = "TT_string", match.group()[1:-1], match.end()
+            elif kind == _HASH:
+                stop = text.find("\n", pos)
+                pos = end if stop < 0 else stop
+                continue
+            elif kind == _SLASH:
+                match = _BLOCK_COMMENT.match(text, pos)
+                if match is not None:
+                    pos = match.end()
+                    continue
+                token_type, value, stop = "TT_div", "/", pos + 1
+            else:
+                illegal.append(pos + offset)
+                pos += 1
+                continue
+            add_type(token_type)
+            add_value(value)
+            add_position(pos + offset)
+            add_line(lineno)
+            pos = stop
+        return TokenArrays(types, values, positions, lines, illegal, lineno)
+
+    def _open_string(self, text, offset, illegal):
+        """Return the offset of the first unmatched quote whose string runs to the end of text, or None."""
+        for position in illegal:
+            start = position - offset
+            if text[start] == '"' and _STRING_BODY.match(text, start + 1).end() == len(text):
+                return position
+        return None
+
+    def _report(self, text, offset, illegal):
+        if self.report_errors:
+            for position in illegal:
+                print(f"Illegal character '{text[position - offset]}'")
+
+
+# --- Benchmark ---
+# python fastlexer.py [files...] compares this lexer with PLY's on the given
+# sources (question.txt by default) and checks that both produce the same tokens.
+
+def _benchmark(paths, repeat=20):
+    ply_lexer = Lexer(report_errors=False).lexer
+    fast_lexer = FastLexer(report_errors=False)
+    for path in paths:
+        with open(path, "r") as file:
+            text = file.read()
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            ply_lexer.lineno = 1
+            ply_lexer.input(text)
+            ply_tokens = list(ply_lexer)
+        ply_seconds = (time.perf_counter() - started) / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fast_tokens = fast_lexer.tokenize(text)
+        fast_seconds = (time.perf_counter() - started) / repeat
+
+        same = ([(t.type, t.value, t.lineno, t.lexpos) for t in ply_tokens]
+                == [(t.type, t.value, t.lineno, t.lexpos) for t in fast_tokens])
+        print(f"{path}: {len(ply_tokens)} tokens, PLY {ply_seconds * 1000:.3f} ms, "
+              f"fast {fast_seconds * 1000:.3f} ms ({ply_seconds / fast_seconds:.1f}x), "
+              f"{'identical' if same else 'TOKENS DIFFER'}")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1:] or ["question.txt"])
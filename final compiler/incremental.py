@@ -0,0 +1,223 @@
+from bisect import bisect_left, bisect_right
+from parser import Program
+from pipeline import get_pipeline
+
+# --- Incremental Front End ---
+# Keeps the tokens and top-level statements of an open document so an edit
+# is re-lexed and re-parsed only around the text it changed.
+#
+# Lexing restarts at the start of the edited line and stops as soon as a new
+# token begins where an old token began, past the edit; from there on the old
+# tokens are reused, shifted. The lexer keeps no state besides its position
+# and line number, so the rest of the stream cannot differ.
+#
+# Top-level statements are found from the tokens alone: each starts with
+# print, if, while, for, or an identifier followed by "=", and none of those
+# can occur inside an expression. The grammar has no block terminator, so an
+# if, while or for statement runs to the end of the program; edits before it
+# reuse it, edits inside it re-parse it whole.
+
+_SIMPLE_STARTS = {"TT_print"}
+_COMPOUND_STARTS = {"TT_if", "TT_while", "TT_for"}
+
+
+class EditorSession:
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline if pipeline is not None else get_pipeline()
+        self.text = ""
+        self.tokens = []  # LexTokens of the current text
+        self.starts = []  # Start offset of each token
+        self.ends = []  # End offset of each token
+        self.illegal = []  # Offsets of characters the lexer skipped
+        self.units = None  # [start, end, statement] per top-level statement; None until a parse succeeds
+        self.relexed = 0  # Tokens lexed by the last update
+        self.reparsed = 0  # Tokens parsed by the last update
+
+        # A private lexer that records illegal characters instead of printing them
+        self.lexer = self.pipeline.lexer.lexer.clone()
+        self.lexer.lexerrorf = self._skip_illegal
+        self.new_illegal = []
+
+    def update(self, text):
+        """Bring the session up to date with the document text and return its Program AST.
+
+        Raises SyntaxError, as Parser.parse does, when the text does not parse.
+        """
+        if text == self.text and self.units is not None:
+            self.relexed = self.reparsed = 0
+            return Program([statement for _, _, statement in self.units])
+        try:
+            first, new_end, old_end = self._relex(text)
+            return self._reparse(first, new_end, old_end)
+        except Exception:
+            self.units = None  # Re-parse the whole text next time rather than trust a partial update
+            raise
+
+    # --- Lexing ---
+    def _relex(self, text):
+        """Re-lex the edited part of the text.
+
+        Returns (first, new_end, old_end): tokens[first:new_end] are new, and
+        the tokens after them are the old tokens from old_end on.
+        """
+        old = self.text
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, prefix)
+        delta = len(text) - len(old)
+
+        if self.illegal and self.illegal[0] < prefix:
+            restart = 0  # A skipped quote could now pair with a later one
+        else:
+            restart = old.rfind("\n", 0, prefix) + 1
+        first = bisect_right(self.ends, restart)
+        if first < len(self.tokens) and self.starts[first] < restart:
+            restart = self.starts[first]  # A string that spans lines
+        if first > 0:
+            lineno = self.tokens[first - 1].lineno + old.count("\n", self.ends[first - 1], restart)
+        else:
+            lineno = 1 + old.count("\n", 0, restart)
+
+        lexer = self.lexer
+        lexer.input(text)
+        lexer.lexpos = restart
+        lexer.lineno = lineno
+        self.new_illegal = []
+        tokens, starts, ends = [], [], []
+        changed_end = len(text) - suffix
+        old_end = len(self.tokens)
+        line_delta = 0
+        while True:
+            token = lexer.token()
+            if token is None:
+                break
+            if token.lexpos >= changed_end:
+                index = bisect_left(self.starts, token.lexpos - delta, first)
+                if index < len(self.starts) and self.starts[index] == token.lexpos - delta:
+                    old_end = index
+                    line_delta = token.lineno - self.tokens[index].lineno
+                    break
+            tokens.append(token)
+            starts.append(token.lexpos)
+            ends.append(lexer.lexpos)
+
+        tail = self.tokens[old_end:]
+        tail_starts = self.starts[old_end:]
+        tail_ends = self.ends[old_end:]
+        if delta or line_delta:
+            for token in tail:
+                token.lexpos += delta
+                token.lineno += line_delta
+            tail_starts = [start + delta for start in tail_starts]
+            tail_ends = [end + delta for end in tail_ends]
+        old_tail_start = self.starts[old_end] if old_end < len(self.starts) else len(old)
+        self.illegal = ([offset for offset in self.illegal if offset < restart] + self.new_illegal
+                        + [offset + delta for offset in self.illegal if offset >= old_tail_start])
+
+        new_end = first + len(tokens)
+        self.tokens = self.tokens[:first] + tokens + tail
+        self.starts = self.starts[:first] + starts + tail_starts
+        self.ends = self.ends[:first] + ends + tail_ends
+        self.text = text
+        self.relexed = len(tokens)
+        return first, new_end, old_end
+
+    def _skip_illegal(self, token):
+        self.new_illegal.append(token.lexpos)
+        token.lexer.skip(1)
+
+    # --- Parsing ---
+    def _reparse(self, first, new_end, old_end):
+        """Re-parse the top-level statements that overlap tokens changed by the last re-lex, returning the Program."""
+        units = self.units
+        if not units or not self.tokens:
+            # Nothing to reuse, or nothing to parse, which only a full parse reports correctly
+            return self._parse_all()
+
+        # The first affected statement is the one that could extend into the new tokens
+        k = 0
+        while units[k][1] < first:
+            k += 1
+        while k > 0 and not self._is_start(units[k][0]):
+            k -= 1  # Its first token no longer starts a statement, so it joins the one before
+
+        # Statements starting in the reused tail keep their parse
+        shift = new_end - old_end
+        j = k + 1
+        while j < len(units) and units[j][0] < old_end:
+            j += 1
+        region_end = units[j][0] + shift if j < len(units) else len(self.tokens)
+
+        boundaries = []
+        index = units[k][0]
+        while index < region_end:
+            if index == units[k][0] or self._is_start(index):
+                boundaries.append(index)
+                if self.tokens[index].type in _COMPOUND_STARTS:
+                    region_end = len(self.tokens)  # Runs to the end of the program
+                    j = len(units)
+                    break
+            index += 1
+        boundaries.append(region_end)
+
+        new_units = []
+        for start, end in zip(boundaries, boundaries[1:]):
+            try:
+                statements = self.pipeline.parse_tokens(self.tokens[start:end]).statements
+            except SyntaxError:
+                statements = None
+            if statements is None or len(statements) != 1:
+                # Let a full parse report the error exactly as Parser.parse would
+                return self._parse_all()
+            new_units.append([start, end, statements[0]])
+
+        tail = [[start + shift, end + shift, statement] for start, end, statement in units[j:]]
+        self.reparsed = region_end - units[k][0]
+        self.units = units[:k] + new_units + tail
+        return Program([statement for _, _, statement in self.units])
+
+    def _parse_all(self):
+        self.units = None
+        self.reparsed = len(self.tokens)
+        program = self.pipeline.parse_tokens(self.tokens)
+        boundaries = [index for index in range(len(self.tokens)) if index == 0 or self._is_start(index)]
+        compound = next((position for position, index in enumerate(boundaries)
+                         if self.tokens[index].type in _COMPOUND_STARTS), None)
+        if compound is not None:
+            del boundaries[compound + 1:]
+        boundaries.append(len(self.tokens))
+        if len(boundaries) - 1 == len(program.statements):
+            self.units = [[start, end, statement] for start, end, statement
+                          in zip(boundaries, boundaries[1:], program.statements)]
+        return program
+
+    def _is_start(self, index):
+        """Whether the token at index can only be the first token of a statement."""
+        token_type = self.tokens[index].type
+        if token_type in _SIMPLE_STARTS or token_type in _COMPOUND_STARTS:
+            return True
+        return (token_type == "TT_identifier" and index + 1 < len(self.tokens)
+                and self.tokens[index + 1].type == "TT_equ")
+
+
+def _common_prefix(a, b):
+    """Length of the common prefix of two strings, compared in halving blocks."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a, b, prefix):
+    """Length of the common suffix of two strings, not overlapping the common prefix."""
+    low, high = 0, min(len(a), len(b)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
@@ -91,11 +91,13 @@ class Lexer:
 
     # Handle invalid characters
     def t_error(self, t):
-        print(f"Illegal character '{t.value}'")
+        if self.report_errors:
+            print(f"Illegal character '{t.value[0]}'")
         t.lexer.skip(1)
 
-    # Initialize the lexer
-    def __init__(self):
+    # Initialize the lexer; report_errors=False lexes silently, e.g. for highlighting
+    def __init__(self, report_errors=True):
+        self.report_errors = report_errors
         self.lexer = lex.lex(module=self)
 
 tokens = Lexer.tokens
\ No newline at end of file
@@ -0,0 +1,110 @@
+import math
+from parser import (Program, Assignment, PrintStatement, BinaryOp, Literal,
+    Array, ArrayAccess, ForLoop, WhileLoop, IfStatement)
+
+# Arithmetic operators that can be evaluated at compile time
+_FOLDABLE = {
+    "+": lambda left, right: left + right,
+    "-": lambda left, right: left - right,
+    "*": lambda left, right: left * right,
+    "/": lambda left, right: left / right,
+    "**": lambda left, right: left ** right,
+}
+
+# Largest folded constant, in bits for an int or characters for a string.
+# Bigger results are left for run time, so a literal like 10 ** 10 ** 10
+# cannot stall the compile or bloat the constant pool.
+_MAX_FOLDED_SIZE = 4096
+
+# --- Constant Folding ---
+def fold_constants(node):
+    """Fold BinaryOp nodes whose operands are literals, returning the (possibly replaced) node.
+
+    Child nodes are folded in place. Operations that would fail at run time
+    (division by zero, mixing strings and numbers) are left for the executor
+    so the error is still reported where it happens.
+    """
+    if isinstance(node, Program):
+        node.statements = [fold_constants(statement) for statement in node.statements]
+    elif isinstance(node, Assignment):
+        node.value = fold_constants(node.value)
+    elif isinstance(node, PrintStatement):
+        node.expression = fold_constants(node.expression)
+    elif isinstance(node, BinaryOp):
+        node.left = fold_constants(node.left)
+        node.right = fold_constants(node.right)
+        if isinstance(node.left, Literal) and isinstance(node.right, Literal):
+            return _fold_binary_op(node)
+    elif isinstance(node, Array):
+        node.elements = [fold_constants(element) for element in node.elements]
+    elif isinstance(node, ArrayAccess):
+        node.index = fold_constants(node.index)
+    elif isinstance(node, ForLoop):
+        node.iterable = fold_constants(node.iterable)
+        node.body = [fold_constants(statement) for statement in node.body]
+    elif isinstance(node, WhileLoop):
+        node.condition = fold_constants(node.condition)
+        node.body = [fold_constants(statement) for statement in node.body]
+    elif isinstance(node, IfStatement):
+        node.condition = fold_constants(node.condition)
+        node.body = [fold_constants(statement) for statement in node.body]
+        node.elif_clauses = [
+            (fold_constants(condition), [fold_constants(statement) for statement in body])
+            for condition, body in node.elif_clauses
+        ]
+        if node.else_clause:
+            node.else_clause = [fold_constants(statement) for statement in node.else_clause]
+    return node
+
+
+def _fold_binary_op(node):
+    """Evaluate a BinaryOp with two literal operands, or return it unchanged if that is unsafe."""
+    if node.operator not in _FOLDABLE:
+        return node
+    left, right = node.left.value, node.right.value
+    if _too_large(left) or _too_large(right) or _estimate_size(node.operator, left, right) > _MAX_FOLDED_SIZE:
+        return node
+    try:
+        value = _FOLDABLE[node.operator](left, right)
+    except (ArithmeticError, TypeError, ValueError):
+        return node
+    if isinstance(value, float) and not math.isfinite(value):
+        return node
+    if not isinstance(value, (int, float, str)):
+        return node  # e.g. a complex result from a negative base with a fractional power
+    if _too_large(value):
+        return node
+    return Literal(value)
+
+
+def _too_large(value):
+    return _size(value) > _MAX_FOLDED_SIZE
+
+
+def _size(value):
+    """Return the size of a literal value in the units of _MAX_FOLDED_SIZE."""
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, str):
+        return len(value)
+    return 0  # Floats are fixed size
+
+
+def _estimate_size(operator, left, right):
+    """Return an upper bound on the size of an operation's result, without computing it.
+
+    Only power and repetition can grow much faster than their operands; the
+    other operations are bounded by the operand sizes checked beforehand.
+    """
+    if operator == "**" and isinstance(left, int) and isinstance(right, int) and right > 0:
+        if abs(left) <= 1:
+            return 1
+        return right * left.bit_length()
+    if operator == "*":
+        if isinstance(left, str) and isinstance(right, int):
+            return len(left) * max(right, 0)
+        if isinstance(left, int) and isinstance(right, str):
+            return max(left, 0) * len(right)
+    return 0
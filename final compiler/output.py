@@ -0,0 +1,62 @@
+import sys
+import threading
+import time
+
+# --- Flush Policies ---
+FLUSH_LINE = "line"  # Deliver every PRINT as soon as it happens
+FLUSH_BUFFER = "buffer"  # Deliver once buffer_size characters have accumulated
+
+
+# --- Output Writer ---
+class OutputWriter:
+    """Buffered, streaming destination for PRINT output.
+
+    Lines are delivered to a sink callable in chunks of text, so memory use
+    is bounded by the buffer size rather than by the total output. With
+    flush_interval set, a buffered chunk is also delivered once that many
+    seconds have passed since the last delivery.
+    """
+
+    def __init__(self, sink, buffer_size=8192, flush_policy=FLUSH_BUFFER, flush_interval=None):
+        if flush_policy not in (FLUSH_LINE, FLUSH_BUFFER):
+            raise Exception(f"Unknown flush policy: {flush_policy}")
+        self.sink = sink  # Callable receiving each chunk of text
+        self.buffer_size = buffer_size
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.buffered = 0  # Characters currently buffered
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def to_stream(cls, stream=None, **options):
+        """Create a writer that writes to a text stream (stdout by default)."""
+        stream = stream if stream is not None else sys.stdout
+
+        def write(text):
+            stream.write(text)
+            stream.flush()
+        return cls(write, **options)
+
+    def write_line(self, text):
+        """Buffer one line of output, delivering it according to the flush policy."""
+        with self.lock:
+            self.buffer.append(text)
+            self.buffered += len(text) + 1
+            due = (self.flush_policy == FLUSH_LINE or self.buffered >= self.buffer_size
+                   or (self.flush_interval is not None
+                       and time.monotonic() - self.last_flush >= self.flush_interval))
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Deliver any buffered output to the sink."""
+        with self.lock:
+            if not self.buffer:
+                return
+            chunk = "\n".join(self.buffer) + "\n"
+            self.buffer = []
+            self.buffered = 0
+            self.last_flush = time.monotonic()
+        self.sink(chunk)
@@ -1,13 +1,16 @@
 import ply.yacc as yacc  # Importing PLY for syntax analysis
 from lexer import Lexer, tokens
+from fastlexer import FastLexer
 
 # --- AST Node Classes ---
-# Base class for all AST nodes
+# Base class for all AST nodes; every node declares __slots__, so none carries a per-instance __dict__
 class ASTNode:
-    pass
+    __slots__ = ()
 
 # Represents the entire program as a collection of statements
 class Program(ASTNode):
+    __slots__ = ("statements",)
+
     def __init__(self, statements):
         self.statements = statements  # List of all statements in the program
 
@@ -16,6 +19,8 @@ class Program(ASTNode):
 
 # Represents an if-elif-else statement in the program
 class IfStatement(ASTNode):
+    __slots__ = ("condition", "body", "elif_clauses", "else_clause")
+
     def __init__(self, condition, body, elif_clauses, else_clause):
         self.condition = condition  # Condition for the if clause
         self.body = body  # Body of the if clause
@@ -30,6 +35,8 @@ class IfStatement(ASTNode):
 
 # Represents a while loop
 class WhileLoop(ASTNode):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         self.condition = condition  # Condition for the loop
         self.body = body  # Body of the loop
@@ -39,6 +46,8 @@ class WhileLoop(ASTNode):
 
 # Represents a for loop
 class ForLoop(ASTNode):
+    __slots__ = ("variable", "iterable", "body")
+
     def __init__(self, variable, iterable, body):
         self.variable = variable  # Loop variable
         self.iterable = iterable  # Iterable object (e.g., array or range)
@@ -49,6 +58,8 @@ class ForLoop(ASTNode):
 
 # Represents a variable assignment
 class Assignment(ASTNode):
+    __slots__ = ("variable", "value")
+
     def __init__(self, variable, value):
         self.variable = variable  # Variable being assigned to
         self.value = value  # Value being assigned
@@ -58,6 +69,8 @@ class Assignment(ASTNode):
 
 # Represents a print statement
 class PrintStatement(ASTNode):
+    __slots__ = ("expression",)
+
     def __init__(self, expression):
         self.expression = expression  # Expression to be printed
 
@@ -66,6 +79,8 @@ class PrintStatement(ASTNode):
 
 # Represents a binary operation (e.g., addition, subtraction)
 class BinaryOp(ASTNode):
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, operator, left, right):
         self.operator = operator  # Operator (e.g., +, -, *)
         self.left = left  # Left operand
@@ -76,6 +91,8 @@ class BinaryOp(ASTNode):
 
 # Represents a literal value (e.g., integer, string)
 class Literal(ASTNode):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value  # Literal value
 
@@ -86,6 +103,8 @@ class Literal(ASTNode):
 
 # Represents a variable
 class Variable(ASTNode):
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name  # Name of the variable
 
@@ -94,6 +113,8 @@ class Variable(ASTNode):
 
 # Represents an array
 class Array(ASTNode):
+    __slots__ = ("elements",)
+
     def __init__(self, elements):
         self.elements = elements  # List of array elements
 
@@ -102,6 +123,8 @@ class Array(ASTNode):
 
 # Represents accessing an element of an array
 class ArrayAccess(ASTNode):
+    __slots__ = ("array", "index")
+
     def __init__(self, array, index):
         self.array = array  # Array being accessed
         self.index = index  # Index of the element
@@ -124,9 +147,15 @@ class Parser:
     )
 
     # Initialize the parser and lexer
-    def __init__(self):
+    # debug/write_tables control whether PLY writes parser.out and parsetab.py;
+    # optimize trusts the existing parsetab.py without re-validating the grammar;
+    # fast_lexer tokenizes with the hand-written FastLexer instead of PLY's lexer
+    def __init__(self, debug=True, write_tables=True, optimize=False, fast_lexer=False):
         self.lexer = Lexer()
-        self.parser = yacc.yacc(module=self)
+        self.fast_lexer = FastLexer() if fast_lexer else None
+        self.syntax_errors = None  # Collects error tokens while recovering; None raises on the first error
+        self.on_statement = None  # In streaming mode, receives each top-level statement instead of the Program
+        self.parser = yacc.yacc(module=self, debug=debug, write_tables=write_tables, optimize=optimize)
 
     # Parse the program as a list of statements
     def p_program(self, p):
@@ -137,10 +166,17 @@ class Parser:
     def p_statement_list(self, p):
         """statement_list : statement_list statement
                           | statement"""
-        if len(p) == 3:
-            p[0] = p[1] + [p[2]]
+        statement = p[len(p) - 1]
+        if self.on_statement is not None and len(p.stack) == 1:
+            # Only the program's own list sits directly on the stack bottom; hand its statements
+            # over as they are reduced instead of keeping them
+            self.on_statement(statement)
+            p[0] = []
+        elif len(p) == 3:
+            p[1].append(statement)  # Extend in place; copying would make long programs quadratic
+            p[0] = p[1]
         else:
-            p[0] = [p[1]]
+            p[0] = [statement]
 
     # Define a statement
     def p_statement(self, p):
@@ -172,7 +208,8 @@ class Parser:
         """elif_clauses : elif_clauses TT_elif expression TT_colon statement_list
                         | empty"""
         if len(p) == 6:
-            p[0] = p[1] + [(p[3], p[5])]
+            p[1].append((p[3], p[5]))  # Extend in place rather than copying
+            p[0] = p[1]
         else:
             p[0] = []
 
@@ -214,10 +251,11 @@ class Parser:
                       | TT_identifier
                       | array"""
         if len(p) == 2:
-            if isinstance(p[1], (int, float, str)):
+            # Identifiers and string literals are both str values, so check the token type
+            if p.slice[1].type == "TT_identifier":
+                p[0] = Variable(p[1])
+            elif isinstance(p[1], (int, float, str)):
                 p[0] = Literal(p[1])
-            elif isinstance(p[1], str):
-                p[0]= Variable(p[1])
             else:
                 p[0] = p[1]
         else:
@@ -239,7 +277,8 @@ class Parser:
                     | expression
                     | empty"""
         if len(p) == 4:
-            p[0] = p[1] + [p[3]]
+            p[1].append(p[3])  # Extend in place; copying would make long array literals quadratic
+            p[0] = p[1]
         elif len(p) == 2 and p[1] is not None:
             p[0] = [p[1]]
         else:
@@ -254,10 +293,10 @@ class Parser:
                            | TT_print TT_lparen TT_identifier TT_rparen"""
         if len(p) == 5:
             # Handle different types of print statements
-            if isinstance(p[3], (str, int, float)):
+            if p.slice[3].type == "TT_identifier":
+                p[0] = PrintStatement(Variable(p[3]))
+            elif isinstance(p[3], (str, int, float)):
                 p[0] = PrintStatement(Literal(p[3]))
-            elif isinstance(p[3], str):
-                p[0]=PrintStatement(Variable(p[3]))
             else:
                 p[0] = PrintStatement(p[3])
 
@@ -268,6 +307,9 @@ class Parser:
 
     def p_error(self, p):
         """Handle syntax errors in the input."""
+        if self.syntax_errors is not None:  # Record the error and let PLY resynchronize
+            self.syntax_errors.append(p)
+            return
         if p:  # If the parser knows where the error occurred
             error_message = f"Syntax error at token '{p.value}' (type: {p.type}) on line {p.lineno}."
         else:  # If the parser is lost and doesn't know where the error occurred
@@ -276,8 +318,45 @@ class Parser:
 
     # Parse the input code
     def parse(self, data):
+        if self.fast_lexer is not None:
+            return self.parse_tokens(self.fast_lexer.tokenize(data))
+        self.lexer.lexer.lineno = 1  # The lexer is reused across parses
         return self.parser.parse(data, lexer=self.lexer.lexer)
 
+    # Parse the input, passing each top-level statement to on_statement as soon as it is reduced.
+    # The statements are not kept, so memory does not grow with the program; an if, while or for
+    # statement runs to the end of the program and so arrives last, once everything is parsed.
+    def parse_streaming(self, data, on_statement):
+        self.on_statement = on_statement
+        try:
+            self.parse(data)
+        finally:
+            self.on_statement = None
+
+    # Streaming parse of an already lexed sequence of tokens, which may be produced lazily
+    def parse_tokens_streaming(self, tokens, on_statement):
+        self.on_statement = on_statement
+        try:
+            self.parse_tokens(tokens)
+        finally:
+            self.on_statement = None
+
+    # Parse an already lexed sequence of tokens
+    def parse_tokens(self, tokens):
+        stream = iter(tokens)
+        return self.parser.parse(lexer=self.lexer.lexer, tokenfunc=lambda: next(stream, None))
+
+    # Parse tokens without stopping at syntax errors; returns the offending tokens (None for end of input).
+    # PLY discards input after each error until it can start a statement again, and reports
+    # an error only once three tokens have been accepted since the previous one.
+    def find_syntax_errors(self, tokens):
+        self.syntax_errors = []
+        try:
+            self.parse_tokens(tokens)
+        finally:
+            errors, self.syntax_errors = self.syntax_errors, None
+        return errors
+
 # Export AST node classes for external use
 __all__ = [
     "ASTNode", "Program", "IfStatement", "WhileLoop", "ForLoop",
@@ -0,0 +1,219 @@
+from bytecode import (Bytecode, TEMP_READS, TEMP_WRITES, VAR_READS, VAR_WRITES,
+    JUMP_OPERAND, LOAD_CONST, LOAD_VAR, STORE, ADD, SUB, MUL, DIV,
+    ADD_VAR, SUB_VAR, MUL_VAR, DIV_VAR)
+
+# --- Peephole Optimizer ---
+# Runs on decoded bytecode, before register allocation, while temporaries
+# still have the unique names IRGenerator gave them.
+
+# Arithmetic opcodes and the superinstruction that replaces a
+# LOAD_VAR / LOAD_VAR / op / STORE sequence on variables
+_FUSED = {
+    ADD: ADD_VAR,
+    SUB: SUB_VAR,
+    MUL: MUL_VAR,
+    DIV: DIV_VAR,
+}
+
+PASSES = ("fuse", "forward_stores", "dead_stores", "dead_loads")
+
+
+class PeepholeReport:
+    def __init__(self, original):
+        self.original = original  # Instruction count before optimization
+        self.removed = {name: 0 for name in PASSES}  # Instructions removed per pass
+        self.fused = 0  # Superinstructions created
+
+    @property
+    def total_removed(self):
+        return sum(self.removed.values())
+
+    def __repr__(self):
+        details = ", ".join(f"{name}={count}" for name, count in self.removed.items())
+        return (f"PeepholeReport(removed={self.total_removed} of {self.original}, "
+                f"fused={self.fused}, {details})")
+
+
+def peephole(bytecode, passes=PASSES):
+    """Optimize decoded bytecode with the given passes, returning (Bytecode, PeepholeReport).
+
+    The passes are repeated until none of them removes an instruction, since
+    dropping a dead store can make the load that fed it dead as well.
+    """
+    for name in passes:
+        if name not in _PASS_FUNCTIONS:
+            raise Exception(f"Unknown peephole pass: {name}")
+
+    report = PeepholeReport(len(bytecode.code))
+    code = list(bytecode.code)
+    source = list(bytecode.source)
+    changed = True
+    while changed:
+        changed = False
+        for name in passes:
+            code = _PASS_FUNCTIONS[name](code, report)
+            removed = code.count(None)
+            if removed:
+                report.removed[name] += removed
+                code, source = _compact(code, source)
+                changed = True
+
+    optimized = Bytecode(code, source, bytecode.variable_names, bytecode.constants)
+    return optimized, report
+
+
+def _fuse(code, report):
+    """Replace LOAD_VAR x a; LOAD_VAR y b; op a b c; STORE c z with one op_VAR x y z."""
+    reads, writes = _temp_counts(code)
+    targets = _jump_targets(code)
+    code = list(code)
+    pc = 0
+    while pc + 3 < len(code):
+        first, second, operation, store = code[pc:pc + 4]
+        if (first[0] == LOAD_VAR and second[0] == LOAD_VAR
+                and operation[0] in _FUSED and store[0] == STORE
+                and not targets.intersection((pc + 1, pc + 2, pc + 3))):
+            left, right, result = first[2], second[2], operation[3]
+            temps = (left, right, result)
+            if (operation[1] == left and operation[2] == right and store[1] == result
+                    and left != right
+                    and all(reads[temp] == 1 and writes[temp] == 1 for temp in temps)):
+                code[pc] = (_FUSED[operation[0]], first[1], second[1], store[2])
+                code[pc + 1] = code[pc + 2] = code[pc + 3] = None
+                report.fused += 1
+                pc += 4
+                continue
+        pc += 1
+    return code
+
+
+def _forward_stores(code, report):
+    """Drop a LOAD_VAR that re-reads a variable stored earlier in the same basic block.
+
+    The loaded temporary is renamed to the one that was stored, which is safe
+    because both are written exactly once.
+    """
+    reads, writes = _temp_counts(code)
+    targets = _jump_targets(code)
+    code = list(code)
+    renames = {}
+    stored = {}  # Variable slot -> temporary holding its value in this block
+    for pc, instr in enumerate(code):
+        if pc in targets:
+            stored = {}
+        op = instr[0]
+        operands = instr[1:]
+        if op == LOAD_VAR and operands[0] in stored and writes[operands[1]] == 1:
+            renames[operands[1]] = stored[operands[0]]
+            code[pc] = None
+            continue
+        for position in VAR_WRITES.get(op, ()):
+            stored.pop(operands[position], None)
+        if op == STORE:
+            # Only single-definition temporaries are forwarded, so the value
+            # cannot be overwritten between the store and the load
+            temp = renames.get(operands[0], operands[0])
+            if writes[temp] == 1:
+                stored[operands[1]] = temp
+        if op in JUMP_OPERAND:
+            stored = {}
+
+    if not renames:
+        return code
+    renamed = []
+    for instr in code:
+        if instr is None:
+            renamed.append(None)
+            continue
+        op = instr[0]
+        operands = list(instr[1:])
+        for position in TEMP_READS.get(op, ()):
+            operands[position] = renames.get(operands[position], operands[position])
+        renamed.append((op, operands[0], operands[1], operands[2]))
+    return renamed
+
+
+def _dead_stores(code, report):
+    """Drop a STORE whose variable is overwritten before it is read in the same basic block."""
+    targets = _jump_targets(code)
+    code = list(code)
+    overwritten = set()  # Variable slots written later in this block before any read
+    for pc in range(len(code) - 1, -1, -1):
+        op = code[pc][0]
+        operands = code[pc][1:]
+        if pc + 1 in targets or op in JUMP_OPERAND:
+            overwritten = set()  # The next block may read any variable
+        for position in VAR_WRITES.get(op, ()):
+            slot = operands[position]
+            if op == STORE and slot in overwritten:
+                code[pc] = None
+            overwritten.add(slot)
+        for position in VAR_READS.get(op, ()):
+            overwritten.discard(operands[position])
+    return code
+
+
+def _dead_loads(code, report):
+    """Drop LOAD_CONST and LOAD_VAR instructions whose temporary is never read."""
+    reads, writes = _temp_counts(code)
+    return [None if instr[0] in (LOAD_CONST, LOAD_VAR) and not reads.get(instr[2]) else instr
+            for instr in code]
+
+
+def _temp_counts(code):
+    """Count how many instructions read and write each temporary."""
+    reads = {}
+    writes = {}
+    for instr in code:
+        if instr is None:
+            continue
+        op = instr[0]
+        for position in TEMP_READS.get(op, ()):
+            temp = instr[1 + position]
+            reads[temp] = reads.get(temp, 0) + 1
+        for position in TEMP_WRITES.get(op, ()):
+            temp = instr[1 + position]
+            writes[temp] = writes.get(temp, 0) + 1
+    for temp in writes:
+        reads.setdefault(temp, 0)
+    return reads, writes
+
+
+def _jump_targets(code):
+    """Return the set of instruction indexes that some jump can land on."""
+    return {instr[1 + JUMP_OPERAND[instr[0]]] for instr in code
+            if instr is not None and instr[0] in JUMP_OPERAND}
+
+
+def _compact(code, source):
+    """Remove deleted (None) instructions and renumber jump targets to match."""
+    new_index = []
+    kept = 0
+    for instr in code:
+        new_index.append(kept)
+        if instr is not None:
+            kept += 1
+    new_index.append(kept)  # A jump to the end of the program
+
+    compacted = []
+    compacted_source = []
+    for instr, text in zip(code, source):
+        if instr is None:
+            continue
+        op = instr[0]
+        if op in JUMP_OPERAND:
+            operands = list(instr[1:])
+            position = JUMP_OPERAND[op]
+            operands[position] = new_index[operands[position]]
+            instr = (op, operands[0], operands[1], operands[2])
+        compacted.append(instr)
+        compacted_source.append(text)
+    return compacted, compacted_source
+
+
+_PASS_FUNCTIONS = {
+    "fuse": _fuse,
+    "forward_stores": _forward_stores,
+    "dead_stores": _dead_stores,
+    "dead_loads": _dead_loads,
+}
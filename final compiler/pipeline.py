@@ -0,0 +1,167 @@
+import os
+import threading
+from parser import Parser
+from fastlexer import FastLexer
+from IRGenerator import IRGenerator
+from IRExecutor import IRExecutor
+from bytecode import decode
+from peephole import peephole, PASSES
+from regalloc import allocate_registers
+from cache import CompilationCache
+from bytecode_file import write_bytecode
+from tracing import tracer, INFO
+
+LEXERS = ("ply", "fast")  # Lexer backends; NEW_COMPILER_LEXER picks the default, "ply" otherwise
+
+
+# --- Compiled Pipeline ---
+# Builds the PLY lexer and parser once per process and reuses them for every
+# compile. Building them runs PLY's grammar reflection and, with the default
+# options, may rewrite parsetab.py and parser.out.
+class CompilerPipeline:
+    def __init__(self, lexer=None):
+        if lexer is None:
+            lexer = os.environ.get("NEW_COMPILER_LEXER", "ply").lower()
+        if lexer not in LEXERS:
+            raise Exception(f"Unknown lexer: {lexer}")
+        # Load the existing parse tables without re-validating or rewriting them
+        self.parser = Parser(debug=False, write_tables=False, optimize=True, fast_lexer=lexer == "fast")
+        self.lexer = self.parser.lexer
+        self.lock = threading.Lock()  # The PLY parser keeps per-parse state
+        self.cache = CompilationCache()  # Compiled bytecode keyed on source hash
+        self.last_report = None  # PeepholeReport of the last assemble, None after a cache hit
+
+    def tokenize(self, code):
+        """Return the list of tokens for the source code."""
+        if self.parser.fast_lexer is not None:
+            return list(self.parser.fast_lexer.tokenize(code))
+        lexer = self.lexer.lexer.clone()  # Cloning reuses the compiled master regex
+        lexer.lineno = 1
+        lexer.input(code)
+        return list(lexer)
+
+    def tokenize_file(self, source_path):
+        """Yield the tokens of a source file, reading and lexing it in chunks.
+
+        FastLexer does this whichever lexer is selected, as PLY's lexer needs
+        the whole input as one string.
+        """
+        lexer = self.parser.fast_lexer if self.parser.fast_lexer is not None else FastLexer()
+        return lexer.tokenize_file(source_path)
+
+    def parse(self, code):
+        """Parse source code into a Program AST."""
+        with self.lock:
+            return self.parser.parse(code)
+
+    def parse_tokens(self, tokens):
+        """Parse a list of tokens, as produced by tokenize, into a Program AST."""
+        with self.lock:
+            return self.parser.parse_tokens(tokens)
+
+    def find_syntax_errors(self, tokens):
+        """Parse a list of tokens, recovering from errors, and return every token that caused one."""
+        with self.lock:
+            return self.parser.find_syntax_errors(tokens)
+
+    def generate(self, ast, optimize=True):
+        """Generate IR for an AST, returning the IRGenerator that holds it."""
+        ir_generator = IRGenerator(optimize=optimize)
+        ir_generator.generate(ast)
+        return ir_generator
+
+    def generate_streaming(self, code, optimize=True):
+        """Parse source code and generate its IR statement by statement, returning the IRGenerator.
+
+        IR for each top-level statement is emitted as soon as the statement is
+        parsed, and no AST for the whole program is built.
+        """
+        ir_generator = IRGenerator(optimize=optimize)
+        with self.lock:
+            self.parser.parse_streaming(code, ir_generator.generate_statement)
+        return ir_generator
+
+    def generate_file(self, source_path, optimize=True):
+        """Generate IR for a source file read and lexed in chunks, returning the IRGenerator.
+
+        Neither the whole source text nor an AST for the whole program is held
+        in memory.
+        """
+        ir_generator = IRGenerator(optimize=optimize)
+        with self.lock:
+            self.parser.parse_tokens_streaming(self.tokenize_file(source_path), ir_generator.generate_statement)
+        return ir_generator
+
+    def assemble(self, ir_generator, peephole_passes=PASSES):
+        """Decode, optimize and register-allocate the IR held by an IRGenerator.
+
+        The peephole optimizer's PeepholeReport is kept in last_report and
+        traced at INFO level.
+        """
+        bytecode = decode(ir_generator.instructions, ir_generator.symbols)
+        report = None
+        if peephole_passes:
+            bytecode, report = peephole(bytecode, peephole_passes)
+            if tracer.enabled(INFO):
+                tracer.emit(INFO, "peephole", repr(report))
+        self.last_report = report
+        return allocate_registers(bytecode)
+
+    def compile(self, code, peephole_passes=PASSES, use_cache=True):
+        """Compile source code into bytecode ready for IRExecutor.run.
+
+        Unchanged sources are served from the compilation cache and skip
+        lexing, parsing and IR generation entirely.
+        """
+        if not use_cache:
+            return self.assemble(self.generate_streaming(code), peephole_passes)
+        key = self.cache.key(code, tuple(peephole_passes or ()))
+        bytecode = self.cache.get(key)
+        if bytecode is None:
+            bytecode = self.assemble(self.generate_streaming(code), peephole_passes)
+            self.cache.put(key, bytecode)
+            tracer.emit(INFO, "compile", f"compiled {len(bytecode)} instructions (cache miss)")
+        else:
+            self.last_report = None
+            tracer.emit(INFO, "compile", f"reused {len(bytecode)} instructions (cache hit)")
+        return bytecode
+
+    def compile_file(self, source_path, output_path=None, peephole_passes=PASSES, stream=False):
+        """Compile a source file to a binary bytecode file, returning the output path.
+
+        The output defaults to the source path with a .ncb extension. With
+        stream=True the source is lexed in chunks (see generate_file) and the
+        compilation cache is not used.
+        """
+        if output_path is None:
+            output_path = os.path.splitext(source_path)[0] + ".ncb"
+        if stream:
+            bytecode = self.assemble(self.generate_file(source_path), peephole_passes)
+        else:
+            with open(source_path, "r") as file:
+                code = file.read()
+            bytecode = self.compile(code, peephole_passes)
+        write_bytecode(bytecode, output_path)
+        return output_path
+
+    def run(self, code, output=None):
+        """Compile and execute source code.
+
+        Output is streamed to the given OutputWriter, or returned as a string
+        when none is given.
+        """
+        return IRExecutor().run(self.compile(code), output)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Return the process-wide CompilerPipeline, building it on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = CompilerPipeline()
+    return _pipeline
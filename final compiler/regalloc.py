@@ -0,0 +1,85 @@
+import heapq
+from bytecode import Bytecode, TEMP_READS, TEMP_WRITES, JUMP, JUMPF, ITER_HASNEXT
+
+# --- Register Allocator ---
+# Maps the named temporaries of decoded bytecode onto a small set of reusable
+# numbered registers, using liveness analysis over the control-flow graph and
+# a linear scan over each temporary's live range.
+
+def allocate_registers(bytecode):
+    """Return a copy of the bytecode with temporaries replaced by register numbers."""
+    code = bytecode.code
+    starts, ends = _live_ranges(code)
+
+    # Linear scan: hand out the lowest free register at the start of each range
+    assignment = {}
+    active = []  # Heap of (end, register) for ranges that are still live
+    free = []  # Heap of released registers
+    num_registers = 0
+    for temp in sorted(starts, key=starts.get):
+        start = starts[temp]
+        while active and active[0][0] < start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            register = heapq.heappop(free)
+        else:
+            register = num_registers
+            num_registers += 1
+        assignment[temp] = register
+        heapq.heappush(active, (ends[temp], register))
+
+    allocated = []
+    for op, a, b, c in code:
+        operands = [a, b, c]
+        # A position both read and written (MAP's scalar) is renamed once
+        for position in set(TEMP_READS.get(op, ()) + TEMP_WRITES.get(op, ())):
+            operands[position] = assignment[operands[position]]
+        allocated.append((op, operands[0], operands[1], operands[2]))
+    return Bytecode(allocated, bytecode.source, bytecode.variable_names,
+                    bytecode.constants, num_registers)
+
+
+def _live_ranges(code):
+    """Compute the first and last instruction index at which each temporary is live."""
+    count = len(code)
+    uses = []
+    defs = []
+    successors = []
+    for pc, (op, a, b, c) in enumerate(code):
+        operands = (a, b, c)
+        uses.append({operands[position] for position in TEMP_READS.get(op, ())})
+        defs.append({operands[position] for position in TEMP_WRITES.get(op, ())})
+        if op == JUMP:
+            targets = (a,)
+        elif op in (JUMPF, ITER_HASNEXT):
+            targets = (pc + 1, b)
+        else:
+            targets = (pc + 1,)
+        # A jump to the end of the program has no successor instruction
+        successors.append(tuple(target for target in targets if target < count))
+
+    # Backward dataflow until no live-in set changes; straight-line code
+    # settles in one pass and each enclosing loop adds at most one more
+    live_in = [set() for _ in range(count)]
+    live_out = [set() for _ in range(count)]
+    changed = True
+    while changed:
+        changed = False
+        for pc in range(count - 1, -1, -1):
+            out = set()
+            for successor in successors[pc]:
+                out |= live_in[successor]
+            live_out[pc] = out
+            new_in = uses[pc] | (out - defs[pc])
+            if new_in != live_in[pc]:
+                live_in[pc] = new_in
+                changed = True
+
+    starts = {}
+    ends = {}
+    for pc in range(count):
+        for temp in defs[pc] | live_in[pc] | live_out[pc]:
+            if temp not in starts:
+                starts[temp] = pc
+            ends[temp] = pc
+    return starts, ends
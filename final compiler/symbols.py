@@ -0,0 +1,106 @@
+from parser import (Program, Assignment, PrintStatement, BinaryOp, Literal,
+    Variable, Array, ArrayAccess, ForLoop, WhileLoop, IfStatement)
+
+# --- Symbol Table ---
+# Maps every named variable to a fixed slot index, so the executor can read
+# and write variables by position instead of by name
+class SymbolTable:
+    def __init__(self):
+        self.slots = {}  # Variable name -> slot index
+        self.names = []  # Slot index -> variable name
+
+    def define(self, name):
+        """Return the slot for a variable, allocating one on first definition."""
+        if name not in self.slots:
+            self.slots[name] = len(self.names)
+            self.names.append(name)
+        return self.slots[name]
+
+    def lookup(self, name):
+        """Return the slot of a variable that must already be defined."""
+        if name not in self.slots:
+            raise Exception(f"Undefined variable: {name}")
+        return self.slots[name]
+
+    def __contains__(self, name):
+        return name in self.slots
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"SymbolTable(slots={self.slots})"
+
+
+# --- Symbol Resolution ---
+def resolve_symbols(node, table=None):
+    """Assign a slot to every variable in the AST and check that each read can follow an assignment.
+
+    A read is accepted when an assignment precedes it or, inside a loop,
+    appears anywhere in the loop body, since an earlier iteration may have
+    run it. Whether the assignment really ran on the path taken is checked
+    at run time where the decoder cannot prove it (see LOAD_VAR_CHECKED).
+    """
+    if table is None:
+        table = SymbolTable()
+
+    if isinstance(node, Program):
+        for statement in node.statements:
+            resolve_symbols(statement, table)
+    elif isinstance(node, Assignment):
+        resolve_symbols(node.value, table)
+        table.define(node.variable.name)
+    elif isinstance(node, PrintStatement):
+        resolve_symbols(node.expression, table)
+    elif isinstance(node, BinaryOp):
+        resolve_symbols(node.left, table)
+        resolve_symbols(node.right, table)
+    elif isinstance(node, Variable):
+        table.lookup(node.name)
+    elif isinstance(node, Array):
+        for element in node.elements:
+            resolve_symbols(element, table)
+    elif isinstance(node, ArrayAccess):
+        resolve_symbols(node.array, table)
+        resolve_symbols(node.index, table)
+    elif isinstance(node, ForLoop):
+        resolve_symbols(node.iterable, table)
+        table.define(node.variable.name)
+        _define_assigned(node.body, table)
+        for statement in node.body:
+            resolve_symbols(statement, table)
+    elif isinstance(node, WhileLoop):
+        _define_assigned(node.body, table)
+        resolve_symbols(node.condition, table)
+        for statement in node.body:
+            resolve_symbols(statement, table)
+    elif isinstance(node, IfStatement):
+        resolve_symbols(node.condition, table)
+        for statement in node.body:
+            resolve_symbols(statement, table)
+        for condition, body in node.elif_clauses:
+            resolve_symbols(condition, table)
+            for statement in body:
+                resolve_symbols(statement, table)
+        for statement in node.else_clause or []:
+            resolve_symbols(statement, table)
+    elif not isinstance(node, (Literal, int, float, str)):
+        raise Exception(f"Unsupported AST node: {type(node)}")
+    return table
+
+
+def _define_assigned(statements, table):
+    """Define every variable assigned anywhere in a list of statements."""
+    for statement in statements:
+        if isinstance(statement, Assignment):
+            table.define(statement.variable.name)
+        elif isinstance(statement, ForLoop):
+            table.define(statement.variable.name)
+            _define_assigned(statement.body, table)
+        elif isinstance(statement, WhileLoop):
+            _define_assigned(statement.body, table)
+        elif isinstance(statement, IfStatement):
+            _define_assigned(statement.body, table)
+            for _, body in statement.elif_clauses:
+                _define_assigned(body, table)
+            _define_assigned(statement.else_clause or [], table)
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# --- Trace Levels ---
+OFF = 0
+INFO = 1  # One record per compile or run stage
+DEBUG = 2  # Stage outputs: tokens, AST, IR
+TRACE = 3  # One record per executed instruction
+
+LEVEL_NAMES = {"off": OFF, "info": INFO, "debug": DEBUG, "trace": TRACE}
+_LEVEL_LABELS = {value: name.upper() for name, value in LEVEL_NAMES.items()}
+
+
+# --- Sinks ---
+# A sink receives (timestamp, level, category, message) records
+class RingBufferSink:
+    """Keeps the most recent records in memory, dropping the oldest when full."""
+
+    def __init__(self, capacity=10000):
+        self.records = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+
+    def write(self, timestamp, level, category, message):
+        with self.lock:
+            self.records.append((timestamp, level, category, message))
+
+    def dump(self):
+        """Return the buffered records as formatted lines, oldest first."""
+        with self.lock:
+            records = list(self.records)
+        return [_format(*record) for record in records]
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+
+class StreamSink:
+    """Writes each record as a line to a text stream (stderr by default)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stderr
+        self.lock = threading.Lock()
+
+    def write(self, timestamp, level, category, message):
+        with self.lock:
+            self.stream.write(_format(timestamp, level, category, message) + "\n")
+
+
+# --- Tracer ---
+class Tracer:
+    """Leveled trace hook; with level OFF nothing is formatted or recorded.
+
+    Callers on hot paths should test tracer.level (or enabled()) once and
+    only build messages when tracing is on.
+    """
+
+    def __init__(self, level=OFF, sink=None):
+        self.level = level
+        self.sink = sink if sink is not None else RingBufferSink()
+
+    def enabled(self, level):
+        return self.level >= level
+
+    def emit(self, level, category, message):
+        if self.level >= level:
+            self.sink.write(time.time(), level, category, message)
+
+
+def configure(level, sink=None):
+    """Set the level (a constant or a name such as "debug") and optionally the sink of the global tracer."""
+    if isinstance(level, str):
+        level = LEVEL_NAMES[level.lower()]
+    tracer.level = level
+    if sink is not None:
+        tracer.sink = sink
+    return tracer
+
+
+def _format(timestamp, level, category, message):
+    return f"{timestamp:.6f} {_LEVEL_LABELS.get(level, str(level)):5s} [{category}] {message}"
+
+
+# Process-wide tracer; NEW_COMPILER_TRACE=debug (for example) turns it on at startup
+tracer = Tracer(LEVEL_NAMES.get(os.environ.get("NEW_COMPILER_TRACE", "off").lower(), OFF))
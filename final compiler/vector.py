@@ -0,0 +1,127 @@
+import operator
+from functools import reduce
+from itertools import repeat
+from array import array
+from arrays import INT_TYPECODE, FLOAT_TYPECODE
+
+try:
+    import numpy  # Optional; the pure-Python paths below give the same results
+except ImportError:
+    numpy = None
+
+# --- Vector Operations ---
+# Runtime side of the REDUCE and MAP instructions, which IRGenerator emits in
+# place of a for loop whose whole body is a recognized reduction or map. Each
+# replaces one interpreted iteration per element with a single call.
+#
+# Results must match what the loop would have produced exactly, so NumPy is
+# only used where it cannot differ from Python arithmetic: no int64 overflow,
+# no change in float rounding. Everywhere else the work is done by builtins
+# over the packed buffer or list, in element order.
+
+# Reduction kinds, by the operand value of REDUCE
+REDUCTIONS = ("SUM", "PRODUCT", "MIN", "MAX")
+SUM, PRODUCT, MIN, MAX = range(len(REDUCTIONS))
+
+# Map kinds, by the operand value of MAP: element op scalar, then scalar op element
+MAPS = ("ADD", "SUB", "MUL", "DIV", "POW", "RADD", "RSUB", "RMUL", "RDIV", "RPOW")
+_MAP_OPERATORS = (operator.add, operator.sub, operator.mul, operator.truediv, operator.pow)
+_DIV = 3
+
+_EXACT_FLOAT = 2 ** 53  # Integers up to this size convert to float without rounding
+_INT64_MAX = 2 ** 63 - 1
+
+
+def reduce_array(kind, values, initial):
+    """Return the accumulator after folding every element of an array into it.
+
+    SUM and PRODUCT compute initial + v or initial * v per element, MIN and
+    MAX replace the accumulator with an element strictly less or greater,
+    exactly as the loops they come from do.
+    """
+    if kind == SUM:
+        return _sum(values, initial)
+    if kind == PRODUCT:
+        return reduce(operator.mul, values, initial)
+    if kind == MIN or kind == MAX:
+        smallest = kind == MIN
+        if isinstance(values, array) and len(values):
+            best = _extreme(values, smallest)
+            return best if ((best < initial) if smallest else (best > initial)) else initial
+        for value in values:  # A list may mix types, so compare in loop order
+            if (value < initial) if smallest else (value > initial):
+                initial = value
+        return initial
+    raise Exception(f"Unsupported reduction: {kind}")
+
+
+def map_array(kind, values, scalar):
+    """Return a list of each element combined with a scalar by the given map kind."""
+    reverse = kind >= len(_MAP_OPERATORS)
+    index = kind - len(_MAP_OPERATORS) if reverse else kind
+    if not 0 <= index < len(_MAP_OPERATORS):
+        raise Exception(f"Unsupported map: {kind}")
+    if index == _DIV:
+        # Raised the way DIV raises it, before any element is computed
+        if (_has_zero(values) if reverse else scalar == 0):
+            raise Exception("Division by zero")
+
+    view = _view(values)
+    if view is not None and index <= _DIV and values.typecode == FLOAT_TYPECODE and _exact_scalar(scalar):
+        with numpy.errstate(all="ignore"):  # Overflow gives inf, as in Python
+            result = (_MAP_OPERATORS[index](scalar, view) if reverse
+                      else _MAP_OPERATORS[index](view, scalar))
+        return result.tolist()
+    function = _MAP_OPERATORS[index]
+    if reverse:
+        return list(map(function, repeat(scalar), values))
+    return list(map(function, values, repeat(scalar)))
+
+
+def _sum(values, initial):
+    view = _view(values)
+    if _packed(values, INT_TYPECODE) and type(initial) is int:
+        if view is not None:
+            bound = max(-int(view.min()), int(view.max())) * len(values)
+            if bound <= _INT64_MAX:  # No partial sum can overflow int64
+                return initial + int(view.sum())
+        return initial + sum(values)  # Integer addition is exact in any order
+    if view is not None and values.typecode == FLOAT_TYPECODE and _exact_scalar(initial):
+        # accumulate adds strictly left to right, unlike sum(), which sums pairwise
+        return numpy.add.accumulate(numpy.concatenate(([initial], view)))[-1].item()
+    return reduce(operator.add, values, initial)
+
+
+def _extreme(values, smallest):
+    """Return the first smallest or largest element of a packed array, as a strict comparison loop keeps it."""
+    view = _view(values)
+    if view is not None:
+        return values[int(view.argmin() if smallest else view.argmax())]
+    return min(values) if smallest else max(values)
+
+
+def _view(values):
+    """Return a NumPy view of a non-empty packed array's buffer, or None."""
+    if numpy is None or not len(values):
+        return None
+    if _packed(values, INT_TYPECODE):
+        return numpy.frombuffer(values, dtype=numpy.int64)
+    if _packed(values, FLOAT_TYPECODE):
+        return numpy.frombuffer(values, dtype=numpy.float64)
+    return None
+
+
+def _packed(values, typecode):
+    return isinstance(values, array) and values.typecode == typecode
+
+
+def _exact_scalar(value):
+    """Whether NumPy sees the same number Python arithmetic would use with a float."""
+    return type(value) is float or (type(value) is int and abs(value) <= _EXACT_FLOAT)
+
+
+def _has_zero(values):
+    view = _view(values)
+    if view is not None:
+        return bool((view == 0).any())
+    return any(value == 0 for value in values)
@@ -2,6 +2,8 @@ import tkinter as tk  # Importing tkinter for GUI creation
 from tkinter import scrolledtext  # Importing ScrolledText for multi-line text widgets
 import ply.lex as lex  # Importing PLY for lexical analysis
 import ply.yacc as yacc  # Importing PLY for syntax analysis
+import queue  # Importing queue for passing events from the worker thread
+import threading  # Importing threading for running the compiler off the Tk thread
 
 # --- AST Node Classes ---
 # Base class for all AST nodes
@@ -221,9 +223,10 @@ class Parser:
     )
 
     # Initialize the parser and lexer
-    def __init__(self):
+    # debug/write_tables control whether PLY writes parser.out and parsetab.py
+    def __init__(self, debug=True, write_tables=True):
         self.lexer = Lexer()
-        self.parser = yacc.yacc(module=self)
+        self.parser = yacc.yacc(module=self, debug=debug, write_tables=write_tables)
 
     # Parse the program as a list of statements
     def p_program(self, p):
@@ -346,8 +349,18 @@ class Parser:
 
     # Parse the input code
     def parse(self, data):
+        self.lexer.lexer.lineno = 1  # The lexer is reused across parses
         return self.parser.parse(data, lexer=self.lexer.lexer)
 
+# Process-wide parser, built on the first Run and reused afterwards
+_parser = None
+
+def get_parser():
+    global _parser
+    if _parser is None:
+        _parser = Parser(debug=False, write_tables=False)
+    return _parser
+
 # --- IR Generator ---
 class IRGenerator:
     def __init__(self):
@@ -482,10 +495,15 @@ class IRGenerator:
         return "\n".join(self.instructions)
 
 # --- GUI IDE ---
+POLL_MS = 50  # How often the Tk thread checks for events from the worker
+
 class IDE:
     def __init__(self):
         self.root = tk.Tk()  # Create the main window
         self.root.title("Custom IDE")  # Set window title
+        self.worker = None  # Background thread of the current run
+        self.events = None  # Queue of (kind, value) events from the worker
+        self.cancel_event = None  # Set to cancel the current run
         self.setup_widgets()  # Initialize widgets
 
     # Setup the widgets in the IDE
@@ -502,6 +520,14 @@ class IDE:
         self.run_button = tk.Button(self.root, text="Run", command=self.run_code)
         self.run_button.pack()
 
+        # Button to cancel the current run
+        self.cancel_button = tk.Button(self.root, text="Cancel", command=self.cancel_run, state='disabled')
+        self.cancel_button.pack()
+
+        # Status line showing the progress of the current run
+        self.status = tk.Label(self.root, text="Ready")
+        self.status.pack()
+
     # Append text to the output console
     def append_output(self, text):
         self.output_console.configure(state='normal')
@@ -509,8 +535,11 @@ class IDE:
         self.output_console.configure(state='disabled')
         self.output_console.see(tk.END)
 
-    # Run the code from the editor
+    # Start compiling the code from the editor on a background thread
     def run_code(self):
+        if self.worker is not None:  # Only one run at a time
+            return
+
         # Clear output console
         self.output_console.configure(state='normal')
         self.output_console.delete(1.0, tk.END)
@@ -519,16 +548,58 @@ class IDE:
         # Retrieve code from the editor
         code = self.editor.get(1.0, tk.END)
 
-        # Parse the code and generate IR
-        parser = Parser()
+        # The worker reports through the event queue, which the Tk thread polls
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = threading.Thread(target=self.compile_worker, args=(code, self.events, self.cancel_event), daemon=True)
+        self.run_button.configure(state='disabled')
+        self.cancel_button.configure(state='normal')
+        self.worker.start()
+        self.root.after(POLL_MS, self.poll_events)
+
+    # Cancel the current run; results of a stage still in progress are discarded
+    def cancel_run(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.status.configure(text="Cancelling...")
+
+    # Parse the code and generate IR off the Tk thread, reporting (kind, value) events
+    def compile_worker(self, code, events, cancel):
         try:
-            ast = parser.parse(code)  # Generate AST
+            events.put(("progress", "Parsing..."))
+            ast = get_parser().parse(code)  # Generate AST
+            if cancel.is_set():
+                return
+            events.put(("progress", "Generating IR..."))
             ir_gen = IRGenerator()  # Create IR generator
             ir_gen.generate(ast)  # Generate IR from AST
-            ir = ir_gen.get_ir()  # Get IR as a string
-            self.append_output(f"IR:\n{ir}\n")  # Display IR in the console
+            if cancel.is_set():
+                return
+            events.put(("output", f"IR:\n{ir_gen.get_ir()}\n"))  # Display IR in the console
         except Exception as e:
-            self.append_output(f"Error: {str(e)}\n")  # Display errors
+            events.put(("output", f"Error: {str(e)}\n"))  # Display errors
+        finally:
+            events.put(("done", None))
+
+    # Apply queued events to the UI, rescheduling until the run is done
+    def poll_events(self):
+        while True:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.status.configure(text=value)
+            elif kind == "output":
+                self.append_output(value)
+            elif kind == "done":
+                self.status.configure(text="Cancelled" if self.cancel_event.is_set() else "Finished")
+                self.worker = None
+                self.cancel_event = None
+                self.run_button.configure(state='normal')
+                self.cancel_button.configure(state='disabled')
+                return
+        self.root.after(POLL_MS, self.poll_events)
 
     # Start the main event loop
     def run(self):